@@ -0,0 +1,324 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from types import SimpleNamespace
+
+import bot
+from results_store import ResultsStore
+from search_index import SearchIndex
+from marker_clusters import MarkerClusterIndex
+from spatial_index import SpatialIndex
+
+CORPUS_DIR = os.path.join("benchmarks", "corpus")
+BASELINE_PATH = os.path.join("benchmarks", "baseline.json")
+# Tamanhos das páginas sintéticas (o maior passa pela extração em streaming)
+SYNTHETIC_SIZES = [100 * 1024, 1024 * 1024, 4 * 1024 * 1024]
+SYNTHETIC_RESULTS = 2000
+SEARCH_INDEX_SIZE = 100000
+SEARCH_QUERIES = ["palacio", "catedrl", "torre de tv", "parque nac"]
+# Área visível aproximada do mapa da tela principal em Brasília
+MAP_BBOX = (-16.0, -48.2, -15.6, -47.6)
+MAP_ZOOMS = range(9, 17)
+# Pontos espalhados pelo país e consultas no centro de Brasília
+SPATIAL_INDEX_SIZE = 100000
+NEARBY_QUERY = (-15.7942, -47.8825)
+MIN_BENCH_TIME = 0.5
+ROUNDS = 3
+REGRESSION_THRESHOLD = 10.0
+
+FILLER_WORDS = (
+    "o museu fica aberto de terça a domingo das nove às dezessete horas e recebe visitantes "
+    "de todo o país com exposições temporárias sobre a história de brasília e do cerrado"
+).split()
+
+logger = logging.getLogger("benchmark")
+
+def safe_name(name):
+    return re.sub(r'[\\/*?:"<>|]', '_', name)
+
+def load_corpus(directory=CORPUS_DIR):
+    corpus = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.txt'):
+            with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                corpus[filename[:-4]] = f.read()
+    return corpus
+
+def record_corpus(directory=CORPUS_DIR):
+    # Captura as páginas reais (requer rede) e salva o texto de cada ponto turístico
+    os.makedirs(directory, exist_ok=True)
+    driver = bot.LazyDriver()
+    try:
+        for landmark in bot.read_tourist_file("tourist_attractions.txt"):
+            texts = []
+            for source in landmark['sources']:
+                try:
+                    page = bot.fetch_page_text(driver, source)
+                    texts.append(page['text'] or '')
+                except Exception as e:
+                    logger.error(f"Erro ao capturar {source}: {e}")
+            path = os.path.join(directory, f"{safe_name(landmark['name'])}.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('\n\n'.join(texts))
+            print(f"Salvo: {path}")
+    finally:
+        driver.quit()
+
+def synthetic_page(corpus, size, seed=42):
+    # Texto de preenchimento intercalado com trechos do corpus, de forma determinística
+    rng = random.Random(seed)
+    pages = list(corpus.values())
+    parts = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.1:
+            part = rng.choice(pages)
+        else:
+            part = ' '.join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(20, 80))) + '.\n'
+        parts.append(part)
+        length += len(part)
+    return ''.join(parts)[:size]
+
+def synthetic_results(corpus, count, seed=42):
+    rng = random.Random(seed)
+    reports = [bot.format_report(bot.extract_relevant_content(text, name)) for name, text in corpus.items()]
+    results = []
+    for index in range(count):
+        report = rng.choice(reports)
+        results.append({
+            'name': f"Ponto sintético {index}",
+            'classification': bot.classify_accessibility(report),
+            'report': report,
+            'coordinates': {
+                'latitude': -15.7942 + rng.uniform(-0.3, 0.3),
+                'longitude': -47.8825 + rng.uniform(-0.3, 0.3)
+            }
+        })
+    return results
+
+def write_results_store(path, results):
+    records = []
+    for result in results:
+        records.append({
+            "name": result['name'],
+            "report": result['report'],
+            "classification": result['classification'][0],
+            "color": result['classification'][1],
+            "sources": [],
+            "coordinates": result['coordinates'],
+            "timestamp": "2025-01-01 00:00:00"
+        })
+    store = ResultsStore(path)
+    store.save_many(records)
+    store.close()
+
+def measure(func, min_time=MIN_BENCH_TIME, rounds=ROUNDS):
+    # Melhor de N rodadas; cada rodada repete a função até atingir min_time
+    best = None
+    for _ in range(rounds):
+        iterations = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            iterations += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        ops = iterations / elapsed
+        best = ops if best is None else max(best, ops)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'ops_per_sec': best, 'peak_memory_kb': peak / 1024}
+
+def build_benchmarks(corpus, workdir):
+    pages = list(corpus.items())
+    items = [bot.extract_relevant_content(text, name) for name, text in pages]
+    reports = [bot.format_report(page_items) for page_items in items]
+    classifications = [bot.classify_accessibility(report) for report in reports]
+    results = [
+        {
+            'name': name,
+            'classification': classification,
+            'report': report,
+            'coordinates': {'latitude': -15.7942, 'longitude': -47.8825}
+        }
+        for (name, _), report, classification in zip(pages, reports, classifications)
+    ]
+    many_results = synthetic_results(corpus, SYNTHETIC_RESULTS)
+
+    benchmarks = {
+        'extract_relevant_content[corpus]': lambda: [bot.extract_relevant_content(text, name) for name, text in pages],
+        'format_report[corpus]': lambda: [bot.format_report(page_items) for page_items in items],
+        'classify_accessibility[corpus]': lambda: [bot.classify_accessibility(report) for report in reports],
+        'create_popup_html[corpus]': lambda: [
+            bot.create_popup_html(result['name'], result['classification'][0], result['classification'][1], result['report'])
+            for result in results
+        ],
+    }
+    for size in SYNTHETIC_SIZES:
+        page = synthetic_page(corpus, size)
+        benchmarks[f'extract_relevant_content[{size // 1024}KB]'] = lambda page=page: bot.extract_relevant_content(page, 'sintetico')
+
+    def plot(data, mode='inline'):
+        def run():
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            try:
+                bot.plot_on_map(data, mode)
+            finally:
+                os.chdir(cwd)
+        return run
+
+    names = list(corpus) + [f"Ponto sintético {index}" for index in range(SEARCH_INDEX_SIZE)]
+    index = SearchIndex(names)
+    benchmarks[f'search_index.search[{SEARCH_INDEX_SIZE}]'] = lambda: [index.search(query) for query in SEARCH_QUERIES]
+
+    def clusters():
+        index = MarkerClusterIndex({'name': r['name'], 'coordinates': r['coordinates']} for r in many_results)
+        return [index.visible_clusters(zoom, MAP_BBOX) for zoom in MAP_ZOOMS]
+
+    benchmarks[f'marker_clusters[{SYNTHETIC_RESULTS}]'] = clusters
+
+    rng = random.Random(42)
+    spatial_index = SpatialIndex(
+        {
+            'name': f"Ponto sintético {index}",
+            'classification': rng.choice(("Acessível", "Parcialmente Acessível", "Não Acessível")),
+            'score': rng.randint(0, 20),
+            'categories': {'mobilidade': rng.randint(0, 10)},
+            'coordinates': {'latitude': rng.uniform(-33.0, 5.0), 'longitude': rng.uniform(-73.0, -35.0)}
+        }
+        for index in range(SPATIAL_INDEX_SIZE)
+    )
+    benchmarks[f'spatial_index.nearby[{SPATIAL_INDEX_SIZE}]'] = lambda: (
+        spatial_index.within(*NEARBY_QUERY, 50, classifications={"Acessível"}),
+        spatial_index.nearest(*NEARBY_QUERY, 10, min_categories={'mobilidade': 5})
+    )
+
+    benchmarks['plot_on_map[corpus]'] = plot(results)
+    benchmarks[f'plot_on_map[{SYNTHETIC_RESULTS}]'] = plot(many_results)
+    benchmarks[f'plot_on_map[geojson {SYNTHETIC_RESULTS}]'] = plot(many_results, 'geojson')
+
+    try:
+        import front
+    except Exception as e:
+        print(f"Front-end indisponível ({e}); benchmark de carregamento ignorado.")
+        return benchmarks
+
+    def load(directory):
+        def run():
+            cwd = os.getcwd()
+            os.chdir(directory)
+            try:
+                holder = SimpleNamespace(results_store=None, detail_cache=None)
+                front.TurismoAcessivelApp.open_results_store(holder)
+                # Mesmo trabalho da thread de carregamento do front (sem a interface)
+                index = MarkerClusterIndex()
+                loaded = []
+                for batch in holder.results_store.iter_summaries(front.LOAD_BATCH_SIZE):
+                    for point in batch:
+                        index.add(point)
+                    loaded.extend(batch)
+                SpatialIndex(loaded)
+                holder.results_store.close()
+            finally:
+                os.chdir(cwd)
+        return run
+
+    # Cópia dos resultados do repositório (a primeira carga faz a migração para a base)
+    repo_results = os.path.join(workdir, 'repo')
+    shutil.copytree('results', os.path.join(repo_results, 'results'),
+                    ignore=shutil.ignore_patterns('results.sqlite*'))
+    synthetic_dir = os.path.join(workdir, 'synthetic')
+    write_results_store(os.path.join(synthetic_dir, 'results', 'results.sqlite'), many_results)
+    benchmarks['load_summaries[results]'] = load(repo_results)
+    benchmarks[f'load_summaries[{SYNTHETIC_RESULTS}]'] = load(synthetic_dir)
+    return benchmarks
+
+def compare(current, baseline, threshold):
+    regressions = []
+    print(f"\n{'Benchmark':45} {'Baseline':>12} {'Atual':>12} {'Variação':>10}")
+    for name, stats in current.items():
+        reference = baseline.get(name)
+        if not reference:
+            print(f"{name:45} {'-':>12} {stats['ops_per_sec']:12.2f} {'novo':>10}")
+            continue
+        change = (stats['ops_per_sec'] / reference['ops_per_sec'] - 1) * 100
+        flag = ''
+        if change < -threshold:
+            regressions.append(name)
+            flag = '  <-- regressão'
+        print(f"{name:45} {reference['ops_per_sec']:12.2f} {stats['ops_per_sec']:12.2f} {change:+9.1f}%{flag}")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks offline da extração e dos relatórios")
+    parser.add_argument("--filter", default="", help="Executa apenas benchmarks cujo nome contém este texto")
+    parser.add_argument("--save-baseline", nargs='?', const=BASELINE_PATH,
+                        help=f"Salva os resultados como baseline (padrão: {BASELINE_PATH})")
+    parser.add_argument("--compare", nargs='?', const=BASELINE_PATH,
+                        help=f"Compara com um baseline salvo (padrão: {BASELINE_PATH})")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Queda percentual de ops/s considerada regressão")
+    parser.add_argument("--min-time", type=float, default=MIN_BENCH_TIME,
+                        help="Tempo mínimo por rodada (s)")
+    parser.add_argument("--record", action="store_true",
+                        help="Recaptura o corpus a partir das páginas reais (requer rede)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Logs do bot distorcem as medições
+    logging.disable(logging.CRITICAL)
+
+    if args.record:
+        logging.disable(logging.NOTSET)
+        record_corpus()
+        return 0
+
+    # Geocodificação sempre local: o benchmark não pode depender do Nominatim
+    bot.get_coordinates = lambda landmark: list(bot.DEFAULT_COORDINATES)
+    corpus = load_corpus()
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    try:
+        benchmarks = build_benchmarks(corpus, workdir)
+        current = {}
+        print(f"{'Benchmark':45} {'ops/s':>12} {'pico (KB)':>12}")
+        for name, func in benchmarks.items():
+            if args.filter not in name:
+                continue
+            current[name] = measure(func, min_time=args.min_time)
+            print(f"{name:45} {current[name]['ops_per_sec']:12.2f} {current[name]['peak_memory_kb']:12.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or '.', exist_ok=True)
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=4)
+        print(f"\nBaseline salvo em {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressão(ões) acima de {args.threshold}%")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
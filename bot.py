@@ -3,8 +3,18 @@ import time
 import re
 import html
 import os
+import sys
+import signal
 import logging
+import bisect
+import codecs
+import hashlib
+import unicodedata
+import argparse
+import threading
 from urllib.parse import urlparse
+from html.parser import HTMLParser
+from collections import defaultdict
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
@@ -12,16 +22,99 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from geopy.geocoders import Nominatim
 import folium
+from folium.plugins import MarkerCluster
+from branca.element import MacroElement, Template
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, UnicodeDammit
+from geocode_cache import GeocodeCache, RateLimiter
+from source_state import SourceStateStore, content_hash
+from metrics import metrics
+from results_store import ResultsStore, RESULTS_DB_PATH
+from map_data import MAP_DATA_DIR, geojson_feature, write_map_data
+from pipeline import Stage, STAGE_QUEUE_SIZE, run_pipeline
+from crawl_scheduler import (HostScheduler, HOST_CONCURRENCY, HOST_MIN_INTERVAL, normalize_url, url_host,
+                             interleave_by_host)
+from gazetteer import GAZETTEER_PATH, load_gazetteer
+from run_journal import RunJournal
+from work_queue import (WorkQueue, Heartbeat, WORK_QUEUE_PATH, LEASE_SECONDS, HEARTBEAT_INTERVAL,
+                        CLAIM_BATCH_SIZE, POLL_INTERVAL, default_worker_id)
 
 # Configurações globais
+TOURIST_FILE = "tourist_attractions.txt"
 TIMEOUT = 30
 MAX_RELEVANT_SNIPPETS = 15
 CONTEXT_WINDOW = 200
+MAX_WORKERS = 4
+
+# Extração em streaming para páginas muito grandes
+STREAMING_THRESHOLD = 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+MAX_MATCH_LENGTH = 200
+
+# Detecção de prontidão da página (substitui as esperas fixas)
+READY_TIMEOUT = 10
+READY_POLL_INTERVAL = 0.1
+NETWORK_IDLE_TIME = 0.5
+SCROLL_SETTLE_TIME = 0.5
+MAX_SCROLLS = 10
+
+# Geocodificação: variantes de consulta em ordem de preferência
+GEOCODE_QUERIES = [
+    ('df', "{name}, Brasília, Distrito Federal, Brazil"),
+    ('brasilia', "{name}, Brasília, Brazil"),
+    ('nome', "{name}")
+]
+GEOCODE_TIMEOUT = 15
+DEFAULT_COORDINATES = [-15.7942, -47.8825]
+
+# Modo de captura: 'auto' (HTTP com fallback para Selenium), 'http' ou 'selenium'
+FETCH_MODE = 'auto'
+FETCH_MODES = ('auto', 'http', 'selenium')
+HTTP_TIMEOUT = 15
+HTTP_POOL_SIZE = 16
+# Leitura da resposta em blocos: acima de STREAMING_THRESHOLD bytes a página é extraída enquanto chega
+HTTP_CHUNK_SIZE = 64 * 1024
+# Resultados gravados por transação na etapa de gravação
+WRITE_BATCH_SIZE = 20
+# Mapa web: 'inline' (um marcador com pop-up pronto por ponto) ou 'geojson' (dados externos com agrupamento)
+MAP_MODE = 'inline'
+MAP_MODES = ('inline', 'geojson')
+
+# Perfil do Chrome: 'lean' bloqueia imagens, mídia, fontes e rastreadores (só lemos o texto da
+# página); 'full' carrega tudo, como um navegador comum
+BROWSER_PROFILE = 'lean'
+BROWSER_PROFILES = ('lean', 'full')
+# Janela pequena, mas acima dos breakpoints de celular (alguns sites escondem texto no layout móvel)
+LEAN_WINDOW_SIZE = "1024,768"
+# Estilos continuam liberados: o texto de body.text depende do CSS (elementos ocultos ficam de fora)
+LEAN_BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3', '*.ogg', '*.m3u8',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googlesyndication.com*',
+    '*googleadservices.com*', '*connect.facebook.net*', '*hotjar.com*', '*clarity.ms*', '*hm.baidu.com*',
+    '*youtube.com/embed*'
+]
+LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.default_content_setting_values.notifications': 2,
+    'profile.default_content_setting_values.geolocation': 2
+}
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4472.124 Safari/537.36"
+
+# Indícios de páginas que só renderizam conteúdo com JavaScript
+JS_ONLY_MARKERS = [
+    'enable javascript', 'javascript is required', 'requires javascript',
+    'habilite o javascript', 'ative o javascript', 'javascript desabilitado',
+    'javascript está desabilitado', 'precisa de javascript'
+]
 
 # Configuração de logging (apenas console)
 logging.basicConfig(
     level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+    format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler()
     ]
@@ -159,20 +252,367 @@ CONTEXT_KEYWORDS = [
     'facilidade', 'deficiência', 'barreira', 'inclusão', 'acesso', 'especial'
 ]
 
-def setup_driver():
+# Recursos que aceitam contexto implícito (ex.: "elevador instalado")
+IMPLICIT_CONTEXT_FEATURES = ['elevadores', 'banheiros_adaptados', 'rampas', 'plataformas_elevatorias']
+IMPLICIT_CONTEXT_WORDS = ['acesso', 'disponível', 'instalado', 'equipado']
+
+def driver_options(profile=BROWSER_PROFILE):
     options = Options()
-    options.headless = True
+    options.add_argument("--headless=new")
     options.add_argument("--disable-gpu")
     options.add_argument("--no-sandbox")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4472.124 Safari/537.36")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    if profile == 'lean':
+        options.add_argument(f"--window-size={LEAN_WINDOW_SIZE}")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--autoplay-policy=user-gesture-required")
+        options.add_argument("--mute-audio")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-background-networking")
+        options.add_experimental_option('prefs', LEAN_PREFS)
+    return options
+
+def block_resources(driver):
+    # Fontes, mídia e domínios de anúncios/analytics são cortados antes da requisição (DevTools)
     try:
-        driver = webdriver.Chrome(options=options)
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+    except Exception as e:
+        logger.warning(f"Não foi possível bloquear recursos no navegador: {e}")
+
+def setup_driver(profile=BROWSER_PROFILE):
+    try:
+        driver = webdriver.Chrome(options=driver_options(profile))
         driver.set_page_load_timeout(TIMEOUT)
+        if profile == 'lean':
+            block_resources(driver)
         return driver
     except Exception as e:
         logger.error(f"Erro ao configurar driver: {e}")
         raise
 
+class LazyDriver:
+    # Só inicia o Chrome quando alguma fonte realmente precisar do navegador
+    def __init__(self, profile=BROWSER_PROFILE):
+        self.profile = profile
+        self._driver = None
+
+    def acquire(self):
+        if self._driver is None:
+            self._driver = setup_driver(self.profile)
+        return self._driver
+
+    def quit(self):
+        if self._driver is not None:
+            self._driver.quit()
+            self._driver = None
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
+    # Sessão única com pool de conexões, compartilhada entre os workers
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update({
+                'User-Agent': USER_AGENT,
+                'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8'
+            })
+            _http_session = session
+        return _http_session
+
+def is_js_only(soup):
+    for noscript in soup.find_all('noscript'):
+        noscript_text = noscript.get_text(' ').lower()
+        if any(marker in noscript_text for marker in JS_ONLY_MARKERS):
+            return True
+    return False
+
+# Elementos cujo texto não é conteúdo da página
+HTML_SKIPPED_TAGS = ('script', 'style', 'noscript', 'template', 'svg')
+
+def html_to_text(page_html, encoding=None):
+    # Com bytes, o BeautifulSoup detecta a codificação pelo <meta charset> quando o
+    # cabeçalho não informa nenhuma
+    soup = BeautifulSoup(page_html, 'html.parser', from_encoding=encoding)
+    if is_js_only(soup):
+        return None
+
+    for tag in soup(list(HTML_SKIPPED_TAGS)):
+        tag.decompose()
+
+    root = soup.body or soup
+    lines = (line.strip() for line in root.get_text('\n').splitlines())
+    return '\n'.join(line for line in lines if line)
+
+class HtmlTextStream(HTMLParser):
+    # Versão incremental de html_to_text(): entrega as linhas não vazias a write() conforme o
+    # HTML chega, sem montar a árvore. Única diferença: o texto do <head> fica sempre de fora
+    # (html_to_text só o inclui em páginas sem <body>)
+    def __init__(self, write):
+        super().__init__(convert_charrefs=True)
+        self.write = write
+        self.lines = 0
+        self.js_only = False
+        self._skipping = 0
+        self._in_head = False
+        self._noscript = None
+        # O HTMLParser pode entregar um mesmo texto em pedaços (no fim de cada feed()); como no
+        # BeautifulSoup, o texto só termina no próximo elemento
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in HTML_SKIPPED_TAGS:
+            self._skipping += 1
+        if tag == 'noscript':
+            self._noscript = []
+        elif tag == 'head':
+            self._in_head = True
+        elif tag == 'body':
+            self._in_head = False
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in HTML_SKIPPED_TAGS and self._skipping:
+            self._skipping -= 1
+        if tag == 'noscript' and self._noscript is not None:
+            noscript_text = ' '.join(self._noscript).lower()
+            self.js_only = self.js_only or any(marker in noscript_text for marker in JS_ONLY_MARKERS)
+            self._noscript = None
+        elif tag == 'head':
+            self._in_head = False
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def handle_data(self, data):
+        if self._noscript is not None:
+            self._noscript.append(data)
+        if not self._skipping and not self._in_head:
+            self._text.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        if not self._text:
+            return
+        text = ''.join(self._text)
+        self._text = []
+        for line in text.splitlines():
+            line = line.strip()
+            if line:
+                self.write(line if not self.lines else '\n' + line)
+                self.lines += 1
+
+def read_prefix(chunks, limit):
+    # Lê os blocos até passar de limit bytes; retorna o que foi lido e se a resposta acabou
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        if len(buffer) > limit:
+            return bytes(buffer), False
+    return bytes(buffer), True
+
+def decode_body(body, encoding):
+    # Como response.text, mas sobre os bytes já lidos em blocos
+    try:
+        return str(body, encoding or 'utf-8', errors='replace')
+    except LookupError:
+        return str(body, 'utf-8', errors='replace')
+
+def stream_encoding(prefix, encoding):
+    # Sem charset no cabeçalho, detecta como o BeautifulSoup (BOM ou <meta charset>) no início
+    # já lido; bytes não ASCII no fim podem ser um caractere cortado ao meio
+    if not encoding:
+        encoding = UnicodeDammit(prefix.rstrip(bytes(range(0x80, 0x100))), is_html=True).original_encoding
+    try:
+        return codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+def extract_http_stream(source, is_html, encoding, prefix, chunks):
+    # Página grande: o texto decodificado vai direto para o StreamingExtractor, sem guardar o
+    # documento. Retorna os itens e o hash do texto (o mesmo de content_hash() sobre ele);
+    # sem texto ou dependente de JavaScript, 'items' fica de fora, como uma página vazia.
+    extractor = StreamingExtractor(source)
+    digest = hashlib.sha256()
+    found_text = False
+
+    def write(text):
+        nonlocal found_text
+        if not text:
+            return
+        digest.update(text.encode('utf-8'))
+        extractor.feed(text)
+        found_text = found_text or not text.isspace()
+
+    parser = HtmlTextStream(write) if is_html else None
+    decoder = stream_encoding(prefix, encoding)
+    sink = parser.feed if parser else write
+    sink(decoder.decode(prefix))
+    for chunk in chunks:
+        metrics.increment('bytes', len(chunk))
+        sink(decoder.decode(chunk))
+    sink(decoder.decode(b'', final=True))
+    if parser:
+        parser.close()
+        if parser.js_only:
+            return {}
+    if not found_text:
+        return {}
+    return {'items': extractor.finish(), 'content_hash': digest.hexdigest()}
+
+def fetch_http(source, state=None):
+    url = normalize_url(source)
+    headers = {}
+    if state:
+        # Requisição condicional com os validadores da execução anterior
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+
+    with metrics.timer('page_load'):
+        response = get_http_session().get(url, headers=headers, timeout=HTTP_TIMEOUT, stream=True)
+    try:
+        page = {
+            'text': None,
+            'not_modified': response.status_code == 304,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        if page['not_modified']:
+            return page
+        response.raise_for_status()
+
+        content_type = response.headers.get('Content-Type', '').lower()
+        is_html = 'html' in content_type
+        if 'text/plain' not in content_type and not is_html:
+            logger.debug(f"Conteúdo não HTML em {url}: {content_type}")
+            return page
+        # Sem charset no cabeçalho, o requests usaria ISO-8859-1 para HTML
+        encoding = response.encoding if not is_html or 'charset=' in content_type else None
+
+        chunks = response.iter_content(HTTP_CHUNK_SIZE)
+        with metrics.timer('page_load'):
+            body, complete = read_prefix(chunks, STREAMING_THRESHOLD)
+        metrics.increment('bytes', len(body))
+        with metrics.timer('text_extraction'):
+            if not complete:
+                # O restante é baixado durante a extração (o tempo fica em text_extraction)
+                logger.info(f"Página com mais de {STREAMING_THRESHOLD} bytes, extraindo durante o download: {url}")
+                metrics.increment('streamed_pages')
+                page.update(extract_http_stream(source, is_html, encoding, body, chunks))
+            elif is_html:
+                page['text'] = html_to_text(body, encoding)
+            else:
+                page['text'] = decode_body(body, encoding)
+        return page
+    finally:
+        response.close()
+
+def wait_for_document_ready(driver, deadline):
+    while time.monotonic() < deadline:
+        if driver.execute_script("return document.readyState") == 'complete':
+            return True
+        time.sleep(READY_POLL_INTERVAL)
+    return False
+
+def wait_for_network_idle(driver, deadline):
+    # Considera a rede ociosa quando nenhum recurso novo aparece por NETWORK_IDLE_TIME
+    last_count = None
+    stable_since = time.monotonic()
+    while time.monotonic() < deadline:
+        count = driver.execute_script("return performance.getEntriesByType('resource').length")
+        now = time.monotonic()
+        if count != last_count:
+            last_count = count
+            stable_since = now
+        elif now - stable_since >= NETWORK_IDLE_TIME:
+            return True
+        time.sleep(READY_POLL_INTERVAL)
+    return False
+
+def scroll_until_stable(driver, deadline):
+    # Rola até o fim enquanto a altura da página continuar crescendo
+    last_height = driver.execute_script("return document.body.scrollHeight")
+    for _ in range(MAX_SCROLLS):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        settle_until = min(deadline, time.monotonic() + SCROLL_SETTLE_TIME)
+        grew = False
+        while time.monotonic() < settle_until:
+            time.sleep(READY_POLL_INTERVAL)
+            height = driver.execute_script("return document.body.scrollHeight")
+            if height > last_height:
+                last_height = height
+                grew = True
+                break
+        if not grew or time.monotonic() >= deadline:
+            break
+
+def wait_for_page_ready(driver, timeout=READY_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    if not wait_for_document_ready(driver, deadline):
+        logger.debug("Tempo limite aguardando document.readyState")
+    if not wait_for_network_idle(driver, deadline):
+        logger.debug("Tempo limite aguardando ociosidade da rede")
+    scroll_until_stable(driver, deadline)
+
+def fetch_selenium(driver, source):
+    driver = driver.acquire()
+    metrics.increment('selenium_fetches')
+    with metrics.timer('page_load'):
+        driver.get(normalize_url(source))
+        WebDriverWait(driver, TIMEOUT).until(
+            EC.presence_of_element_located((By.TAG_NAME, "body")))
+    
+    with metrics.timer('readiness_wait'):
+        wait_for_page_ready(driver)
+    
+    with metrics.timer('text_extraction'):
+        body_text = driver.find_element(By.TAG_NAME, "body").text
+    metrics.increment('bytes', len(body_text.encode('utf-8')))
+    return body_text
+
+def fetch_page_text(driver, source, fetch_mode=FETCH_MODE, state=None):
+    if fetch_mode in ('auto', 'http'):
+        try:
+            page = fetch_http(source, state)
+        except requests.RequestException as e:
+            if fetch_mode == 'http':
+                # Sem o navegador como alternativa, a falha segue para source_failed em vez
+                # de virar uma página vazia (que substituiria o estado salvo da fonte)
+                raise
+            logger.warning(f"Falha no HTTP para {source}: {str(e)[:200]}")
+            page = None
+
+        if page and (page['not_modified'] or 'items' in page or (page['text'] and page['text'].strip())):
+            return page
+        if fetch_mode == 'http':
+            return {'text': '', 'not_modified': False, 'etag': None, 'last_modified': None}
+        logger.info(f"Página vazia ou dependente de JavaScript, usando navegador: {source}")
+
+    return {
+        'text': fetch_selenium(driver, source),
+        'not_modified': False,
+        'etag': None,
+        'last_modified': None
+    }
+
 def read_tourist_file(file_path):
     try:
         with open(file_path, 'r', encoding='utf-8') as file:
@@ -191,90 +631,328 @@ def read_tourist_file(file_path):
         logger.error(f"Erro ao ler arquivo {file_path}: {e}")
         return []
 
+# Letras que os padrões antigos (re.IGNORECASE) já aceitavam no lugar das letras ASCII
+IGNORECASE_FOLDS = {'ı': 'i', 'ſ': 's'}
+# Marcas soltas viram um separador que não é letra nem aparece em nenhum padrão (um espaço
+# juntaria "acesso" + marca + "pcd" em "acesso pcd")
+MARK_SEPARATOR = '\x00'
+_fold_cache = {}
+
+def fold_char(char):
+    # Mantém as fronteiras de palavra (\b) do texto original: uma letra acentuada vira a letra
+    # base e uma marca solta (ex.: o ponto de 'İ'.lower()) vira separador, como era para os
+    # padrões antigos. NFD em vez de NFKD: 'ﬁ' ou 'ａ' não viram letras ASCII.
+    folded = _fold_cache.get(char)
+    if folded is None:
+        if unicodedata.combining(char):
+            folded = MARK_SEPARATOR
+        else:
+            decomposed = unicodedata.normalize('NFD', char)
+            folded = ''.join(c for c in decomposed if not unicodedata.combining(c))
+            folded = IGNORECASE_FOLDS.get(folded, folded)
+        _fold_cache[char] = folded
+    return folded
+
+def fold_text(text):
+    # Remove acentos uma única vez (o texto já vem em minúsculas). Se algum caractere mudar de
+    # tamanho (ex.: um silábico hangul em jamos), devolve também os ajustes de posição para o texto original
+    if text.isascii():
+        return text, None
+
+    table = {ord(char): fold_char(char) for char in set(text) if not char.isascii()}
+    folded = text.translate(table)
+    resized = ''.join(chr(code) for code, value in table.items() if len(value) != 1)
+    if not resized:
+        return folded, None
+
+    positions, deltas = [0], [0]
+    delta = 0
+    for match in re.finditer(f"[{re.escape(resized)}]", text):
+        size = len(table[ord(match.group(0))])
+        folded_end = match.start() - delta + size
+        delta += 1 - size
+        if positions[-1] == folded_end:
+            deltas[-1] = delta
+        else:
+            positions.append(folded_end)
+            deltas.append(delta)
+    return folded, (positions, deltas)
+
+def to_original_position(position, offsets):
+    if offsets is None:
+        return position
+    index = bisect.bisect_right(offsets[0], position) - 1
+    return position + offsets[1][index]
+
+# Padrão combinado para o texto normalizado: uma única varredura encontra as posições onde
+# algum recurso pode começar. Sem acentos ([áa] vira [aa]) ele aceita grafias que os padrões
+# originais recusam (ex.: 'corrimao'), então cada posição é confirmada com o padrão original
+FEATURE_SCANNER = re.compile(
+    '(?=' + '|'.join(f"(?:{fold_text(data['pattern'].pattern)[0]})" for data in ACCESSIBILITY_FEATURES.values()) + ')',
+    re.IGNORECASE
+)
+
+def find_feature_matches(text, folded, offsets):
+    # Equivale a um finditer por recurso (sem sobreposição dentro do mesmo recurso),
+    # mas percorre o texto uma única vez; as posições retornadas são as de text
+    feature_matches = {feature: [] for feature in ACCESSIBILITY_FEATURES}
+    last_end = dict.fromkeys(ACCESSIBILITY_FEATURES, 0)
+
+    for candidate in FEATURE_SCANNER.finditer(folded):
+        position = to_original_position(candidate.start(), offsets)
+        for feature, data in ACCESSIBILITY_FEATURES.items():
+            if position < last_end[feature]:
+                continue
+            match = data['pattern'].match(text, position)
+            if match:
+                feature_matches[feature].append(match.span())
+                last_end[feature] = match.end()
+
+    return feature_matches
+
+def minimal_keywords(keywords):
+    # Uma palavra que contém outra palavra-chave (ex.: 'acesso' contém 'acess') não muda
+    # o resultado de "existe alguma palavra-chave no trecho"
+    keywords = {keyword.lower() for keyword in keywords}
+    return sorted(k for k in keywords if not any(other != k and other in k for other in keywords))
+
+CONTEXT_SEARCH_KEYWORDS = minimal_keywords(CONTEXT_KEYWORDS)
+IMPLICIT_SEARCH_WORDS = minimal_keywords(IMPLICIT_CONTEXT_WORDS)
+
+class KeywordIndex:
+    # Índice ordenado das ocorrências das palavras-chave na página, montado uma única vez,
+    # para responder se há alguma palavra-chave inteira dentro de uma janela [start, end)
+    def __init__(self, text, keywords):
+        occurrences = []
+        for keyword in keywords:
+            position = text.find(keyword)
+            while position != -1:
+                occurrences.append((position, position + len(keyword)))
+                position = text.find(keyword, position + 1)
+        occurrences.sort()
+        self.starts = [start for start, _ in occurrences]
+        self.ends = [end for _, end in occurrences]
+
+    def contains(self, start, end):
+        index = bisect.bisect_left(self.starts, start)
+        while index < len(self.starts) and self.starts[index] < end:
+            if self.ends[index] <= end:
+                return True
+            index += 1
+        return False
+
+class ContextChecker:
+    # Validação de contexto de um texto; os índices só são montados se houver algum termo
+    def __init__(self, text):
+        self.text = text
+        self._context_index = None
+        self._implicit_index = None
+
+    def has_context(self, feature, start, end):
+        if self._context_index is None:
+            self._context_index = KeywordIndex(self.text, CONTEXT_SEARCH_KEYWORDS)
+        if self._context_index.contains(start, end):
+            return True
+        if feature not in IMPLICIT_CONTEXT_FEATURES:
+            return False
+        if self._implicit_index is None:
+            self._implicit_index = KeywordIndex(self.text, IMPLICIT_SEARCH_WORDS)
+        return self._implicit_index.contains(start, end)
+
+class FeatureCollector:
+    # Acumula os itens por recurso, na ordem do texto, com deduplicação de termos
+    def __init__(self, source):
+        self.source = source
+        self.items = {feature: [] for feature in ACCESSIBILITY_FEATURES}
+        self.matched_terms = {feature: set() for feature in ACCESSIBILITY_FEATURES}
+        self.matches = 0
+        self.rejected_context = 0
+        self.duplicates = 0
+
+    def add_match(self, text, checker, feature, match_start, match_end):
+        self.matches += 1
+        term = text[match_start:match_end].lower()
+        start = max(0, match_start - CONTEXT_WINDOW)
+        end = min(len(text), match_end + CONTEXT_WINDOW)
+        snippet = text[start:end].strip()
+        
+        # Validação de contexto
+        if not checker.has_context(feature, start, end):
+            self.rejected_context += 1
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Termo rejeitado por falta de contexto: %s (Feature: %s, Snippet: %s...)", term, feature, snippet[:50])
+            return
+        
+        # Normalização para deduplicação
+        normalized_term = re.sub(r'\s+', ' ', term).strip()
+        normalized_term = re.sub(r's\b', '', normalized_term).strip()
+        
+        # Permite variações distintas
+        term_key = f"{feature}:{normalized_term}"
+        if term_key in self.matched_terms[feature]:
+            self.duplicates += 1
+            logger.debug("Termo duplicado ignorado: %s para %s", term, feature)
+            return
+        
+        self.matched_terms[feature].add(term_key)
+        snippet = html.unescape(snippet)
+        snippet = ' '.join(snippet.split())
+        data = ACCESSIBILITY_FEATURES[feature]
+        self.items[feature].append({
+            'feature': feature,
+            'term': term,
+            'snippet': snippet,
+            'weight': data['weight'],
+            'category': data['category'],
+            'source': self.source
+        })
+        logger.info("Recurso identificado: %s - Termo: %s (Fonte: %s)", feature, term, self.source)
+
+    def result(self):
+        metrics.increment('matches', self.matches)
+        metrics.increment('rejected_by_context', self.rejected_context)
+        metrics.increment('duplicate_terms', self.duplicates)
+        relevant_items = [item for feature in ACCESSIBILITY_FEATURES for item in self.items[feature]]
+        relevant_items.sort(key=lambda x: -x['weight'])
+        return relevant_items[:MAX_RELEVANT_SNIPPETS]
+
 def extract_relevant_content(text, source):
-    relevant_items = []
+    with metrics.timer('matching'):
+        # Páginas muito grandes são processadas em janelas para limitar o uso de memória
+        if len(text) > STREAMING_THRESHOLD:
+            return extract_relevant_content_stream(iter_text_chunks(text), source)
+        return extract_in_memory(text, source)
+
+def extract_in_memory(text, source):
     text = text.lower()
-    matched_terms = {}
-
-    for feature, data in ACCESSIBILITY_FEATURES.items():
-        matched_terms[feature] = set()
-        pattern = data['pattern']
-        weight = data['weight']
-        category = data['category']
-        matches = pattern.finditer(text)
-        
-        for match in matches:
-            term = match.group(0).lower()
-            start = max(0, match.start() - CONTEXT_WINDOW)
-            end = min(len(text), match.end() + CONTEXT_WINDOW)
-            snippet = text[start:end].strip()
-            
-            # Validação de contexto
-            has_context = any(keyword.lower() in snippet for keyword in CONTEXT_KEYWORDS)
-            if not has_context:
-                implicit_context = (
-                    feature in ['elevadores', 'banheiros_adaptados', 'rampas', 'plataformas_elevatorias'] and
-                    any(word in snippet for word in ['acesso', 'disponível', 'instalado', 'equipado'])
-                )
-                if not implicit_context:
-                    logger.debug(f"Termo rejeitado por falta de contexto: {term} (Feature: {feature}, Snippet: {snippet[:50]}...)")
-                    continue
-            
-            # Normalização para deduplicação
-            normalized_term = re.sub(r'\s+', ' ', term).strip()
-            normalized_term = re.sub(r's\b', '', normalized_term).strip()
-            
-            # Permite variações distintas
-            term_key = f"{feature}:{normalized_term}"
-            if term_key not in matched_terms[feature]:
-                matched_terms[feature].add(term_key)
-                snippet = html.unescape(snippet)
-                snippet = ' '.join(snippet.split())
-                
-                relevant_items.append({
-                    'feature': feature,
-                    'term': term,
-                    'snippet': snippet,
-                    'weight': weight,
-                    'category': category,
-                    'source': source
-                })
-                logger.info(f"Recurso identificado: {feature} - Termo: {term} (Fonte: {source})")
-            else:
-                logger.debug(f"Termo duplicado ignorado: {term} para {feature}")
-    
-    relevant_items.sort(key=lambda x: -x['weight'])
-    return relevant_items[:MAX_RELEVANT_SNIPPETS]
+    folded, offsets = fold_text(text)
+    feature_matches = find_feature_matches(text, folded, offsets)
+    checker = ContextChecker(text)
+    collector = FeatureCollector(source)
 
-def scrape_accessibility(driver, landmark, sources):
-    accessibility_data = []
+    for feature in ACCESSIBILITY_FEATURES:
+        for match_start, match_end in feature_matches[feature]:
+            collector.add_match(text, checker, feature, match_start, match_end)
     
-    for source in sources:
-        try:
-            logger.info(f"Analisando fonte: {source}")
-            driver.get(source.split('#')[0])
-            
-            WebDriverWait(driver, TIMEOUT).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body")))
-            time.sleep(3)
-            
-            for _ in range(3):
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1)
-            
-            body_text = driver.find_element(By.TAG_NAME, "body").text
-            relevant_items = extract_relevant_content(body_text, source)
-            
-            if relevant_items:
-                logger.info(f"Encontrados {len(relevant_items)} recursos de acessibilidade em {source}")
-                accessibility_data.extend(relevant_items)
-            else:
-                logger.warning(f"Nenhum recurso de acessibilidade encontrado em {source}")
-                
-        except Exception as e:
-            logger.error(f"Erro ao processar {source}: {str(e)[:200]}")
-    
-    return format_report(accessibility_data)
+    return collector.result()
+
+def iter_text_chunks(text, chunk_size=STREAM_CHUNK_SIZE):
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
+
+class StreamingExtractor:
+    # Varre o texto em janelas sobrepostas: o buffer guarda só o trecho ainda não processado
+    # mais CONTEXT_WINDOW caracteres antes dele, então o pico de memória não depende do tamanho
+    # do documento. No HTTP recebe o texto conforme a resposta chega (extract_http_stream); com
+    # um texto já em memória (Selenium) só evita as cópias em minúsculas/sem acentos dele.
+    # Supõe que nenhum termo tenha mais de MAX_MATCH_LENGTH caracteres.
+    def __init__(self, source):
+        self.collector = FeatureCollector(source)
+        self.buffer = ''
+        self.base = 0
+        self.resume = 0
+        self.last_end = dict.fromkeys(ACCESSIBILITY_FEATURES, 0)
+
+    def feed(self, chunk):
+        for piece in iter_text_chunks(chunk):
+            self.buffer += piece.lower()
+            if len(self.buffer) >= STREAM_CHUNK_SIZE + 2 * (CONTEXT_WINDOW + MAX_MATCH_LENGTH):
+                self._scan(final=False)
+
+    def finish(self):
+        self._scan(final=True)
+        self.buffer = ''
+        return self.collector.result()
+
+    def _scan(self, final):
+        text = self.buffer
+        folded, offsets = fold_text(text)
+        checker = ContextChecker(text)
+        limit = len(folded) if final else len(folded) - MAX_MATCH_LENGTH
+        resume = self.base + to_original_position(max(limit, 0), offsets)
+
+        for candidate in FEATURE_SCANNER.finditer(folded):
+            if candidate.start() >= limit:
+                break
+            position = to_original_position(candidate.start(), offsets)
+            absolute = self.base + position
+            if absolute < self.resume:
+                continue
+
+            pending = []
+            for feature, data in ACCESSIBILITY_FEATURES.items():
+                if absolute < self.last_end[feature]:
+                    continue
+                match = data['pattern'].match(text, position)
+                if match:
+                    pending.append((feature, match.start(), match.end()))
+
+            # Sem contexto suficiente depois do termo: adia para a próxima janela
+            if not final and any(match_end + CONTEXT_WINDOW > len(text) for _, _, match_end in pending):
+                resume = absolute
+                break
+
+            for feature, match_start, match_end in pending:
+                self.last_end[feature] = self.base + match_end
+                self.collector.add_match(text, checker, feature, match_start, match_end)
+
+        self.resume = max(self.resume, resume)
+        keep_from = max(self.base, self.resume - CONTEXT_WINDOW)
+        self.buffer = text[keep_from - self.base:]
+        self.base = keep_from
+
+def extract_relevant_content_stream(chunks, source):
+    extractor = StreamingExtractor(source)
+    for chunk in chunks:
+        extractor.feed(chunk)
+    return extractor.finish()
+
+def fetch_source(driver, source, fetch_mode=FETCH_MODE, source_state=None):
+    # Etapa de captura: retorna o estado salvo da fonte e a página
+    logger.info(f"Analisando fonte: {source}")
+    # Estado por URL normalizada: variantes com fragmentos diferentes são a mesma página
+    state = source_state.get(normalize_url(source)) if source_state else None
+    return state, fetch_page_text(driver, source, fetch_mode, state)
+
+def extract_source(source, state, page, source_state=None):
+    # Etapa de extração: retorna os itens da fonte, se ela mudou desde a última execução e o
+    # hash do conteúdo (gravado com o resultado do ponto)
+    changed = False
+    if page['not_modified'] and state:
+        logger.info(f"Fonte não modificada (HTTP 304): {source}")
+        metrics.increment('sources_not_modified')
+        relevant_items = state['items']
+        body_hash = state['content_hash']
+    else:
+        # Páginas grandes chegam já extraídas (ver extract_http_stream), sem o texto
+        streamed = 'items' in page
+        body_text = page['text'] or ''
+        body_hash = page['content_hash'] if streamed else content_hash(body_text)
+        if state and state['content_hash'] == body_hash:
+            logger.info(f"Conteúdo inalterado: {source}")
+            metrics.increment('sources_unchanged')
+            relevant_items = state['items']
+        else:
+            changed = True
+            relevant_items = page['items'] if streamed else extract_relevant_content(body_text, source)
+        if source_state:
+            source_state.set(normalize_url(source), page['etag'], page['last_modified'], body_hash, relevant_items)
+
+    metrics.increment('sources')
+    metrics.increment('items', len(relevant_items))
+    if relevant_items:
+        logger.info(f"Encontrados {len(relevant_items)} recursos de acessibilidade em {source}")
+    else:
+        logger.warning(f"Nenhum recurso de acessibilidade encontrado em {source}")
+    return with_source(relevant_items, source), changed, body_hash
+
+def with_source(items, source):
+    # Itens vindos de outra variante da mesma URL (estado salvo ou captura compartilhada) levam a fonte do ponto
+    return [item if item.get('source') == source else dict(item, source=source) for item in items]
+
+def source_failed(source, error):
+    metrics.increment('source_errors')
+    logger.error(f"Erro ao processar {source}: {str(error)[:200]}")
 
 def format_report(accessibility_items):
     if not accessibility_items:
@@ -333,87 +1011,167 @@ def classify_accessibility(report):
     else:
         return ("Não Acessível", "red")
 
-def save_json(landmark, report, classification, sources):
-    coordinates = get_coordinates(landmark)  # ← ADICIONADO
+_results_store = None
+_results_store_path = RESULTS_DB_PATH
+_results_store_shared = False
+_results_store_lock = threading.Lock()
+
+def configure_results_store(path=RESULTS_DB_PATH, shared=False):
+    global _results_store, _results_store_path, _results_store_shared
+    with _results_store_lock:
+        _results_store = None
+        _results_store_path = path
+        _results_store_shared = shared
+
+def get_results_store():
+    global _results_store
+    with _results_store_lock:
+        if _results_store is None:
+            _results_store = ResultsStore(_results_store_path, _results_store_shared)
+        return _results_store
+
+def load_saved_result(landmark, source_hashes=None):
+    # Com source_hashes, só retorna o resultado calculado com essas mesmas fontes e conteúdos:
+    # o estado das fontes é gravado antes do resultado e pode estar à frente dele
+    try:
+        data = get_results_store().get(landmark)
+    except Exception as e:
+        logger.error(f"Erro ao ler resultado salvo de {landmark}: {e}")
+        return None
+    if data is None:
+        return None
+    if source_hashes is not None and (data.get('sources') != list(source_hashes)
+                                      or data.get('source_hashes') != source_hashes):
+        return None
+    return {
+        'name': data['name'],
+        'classification': (data['classification'], data['color']),
+        'report': data['report'],
+        'coordinates': data['coordinates']
+    }
 
-    data = {
+def result_data(landmark, report, classification, sources, coordinates, source_hashes=None):
+    return {
         "name": landmark,
         "report": report,
         "classification": classification[0],
         "color": classification[1],
         "sources": sources,
+        "source_hashes": source_hashes or {},
         "coordinates": {
             "latitude": coordinates[0],
             "longitude": coordinates[1]
-        },  # ← ADICIONADO
+        },
         "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
     }
 
-    os.makedirs("results", exist_ok=True)
-    safe_landmark = re.sub(r'[\\/*?:"<>|]', '_', landmark)
-    filename = f"results/{safe_landmark}_accessibility.json"
+_geolocator = None
+_geocode_cache = None
+_geocode_lock = threading.Lock()
+geocode_rate_limiter = RateLimiter()
+# Gazetteer local consultado antes do Nominatim (só é usado se o arquivo existir)
+_gazetteer = None
+_gazetteer_path = GAZETTEER_PATH
+_gazetteer_loaded = False
+remote_geocoding = True
 
-    try:
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        logger.info(f"Arquivo JSON salvo: {filename}")
-        return filename
-    except Exception as e:
-        logger.error(f"Erro ao salvar JSON: {e}")
-        return None
+def configure_geocoding(gazetteer_path=GAZETTEER_PATH, remote=True):
+    global _gazetteer, _gazetteer_path, _gazetteer_loaded, remote_geocoding
+    with _geocode_lock:
+        _gazetteer = None
+        _gazetteer_path = gazetteer_path
+        _gazetteer_loaded = False
+        remote_geocoding = remote
+
+def get_gazetteer():
+    global _gazetteer, _gazetteer_loaded
+    with _geocode_lock:
+        if not _gazetteer_loaded:
+            _gazetteer_loaded = True
+            if _gazetteer_path and os.path.exists(_gazetteer_path):
+                try:
+                    _gazetteer = load_gazetteer(_gazetteer_path, center=DEFAULT_COORDINATES)
+                except Exception as e:
+                    logger.error(f"Erro ao carregar o gazetteer {_gazetteer_path}: {e}")
+            else:
+                logger.info(f"Gazetteer {_gazetteer_path} não encontrado; usando só o Nominatim.")
+        return _gazetteer
+
+def get_geocoder():
+    global _geolocator, _geocode_cache
+    with _geocode_lock:
+        if _geolocator is None:
+            _geolocator = Nominatim(user_agent="accessibility_map_brasilia_v13")
+            _geocode_cache = GeocodeCache()
+        return _geolocator, _geocode_cache
 
 def get_coordinates(landmark):
+    gazetteer = get_gazetteer()
+    if gazetteer is not None:
+        found = gazetteer.lookup(landmark)
+        if found:
+            match, coordinates, similarity = found
+            metrics.increment('gazetteer_hits')
+            logger.info(f"Coordenadas no gazetteer para {landmark}: {match} (semelhança {similarity:.2f})")
+            return coordinates
+        metrics.increment('gazetteer_misses')
+
+    if not remote_geocoding:
+        metrics.increment('geocode_fallbacks')
+        logger.warning(f"Coordenadas não encontradas no gazetteer para {landmark} (modo offline). Usando centro de Brasília.")
+        return list(DEFAULT_COORDINATES)
+
     try:
-        geolocator = Nominatim(user_agent="accessibility_map_brasilia_v13")
-        
-        query = f"{landmark}, Brasília, Distrito Federal, Brazil"
-        location = geolocator.geocode(query, timeout=15)
-        if location:
-            logger.info(f"Coordenadas encontradas para {landmark} (Tentativa 1)")
-            return [location.latitude, location.longitude]
+        geolocator, cache = get_geocoder()
         
-        query = f"{landmark}, Brasília, Brazil"
-        location = geolocator.geocode(query, timeout=15)
-        if location:
-            logger.info(f"Coordenadas encontradas para {landmark} (Tentativa 2)")
-            return [location.latitude, location.longitude]
-        
-        query = landmark
-        location = geolocator.geocode(query, timeout=15)
-        if location:
-            logger.info(f"Coordenadas encontradas para {landmark} (Tentativa 3)")
-            return [location.latitude, location.longitude]
+        for attempt, (variant, template) in enumerate(GEOCODE_QUERIES, start=1):
+            cached, coordinates = cache.get(landmark, variant)
+            if cached:
+                if coordinates:
+                    logger.debug(f"Coordenadas em cache para {landmark} ({variant})")
+                    return coordinates
+                continue
+            
+            geocode_rate_limiter.wait()
+            location = geolocator.geocode(template.format(name=landmark), timeout=GEOCODE_TIMEOUT)
+            coordinates = [location.latitude, location.longitude] if location else None
+            cache.set(landmark, variant, coordinates)
+            if coordinates:
+                logger.info(f"Coordenadas encontradas para {landmark} (Tentativa {attempt})")
+                return coordinates
         
+        metrics.increment('geocode_fallbacks')
         logger.warning(f"Coordenadas não encontradas para {landmark}. Usando centro de Brasília.")
-        return [-15.7942, -47.8825]
+        return list(DEFAULT_COORDINATES)
     
     except Exception as e:
+        metrics.increment('geocode_fallbacks')
         logger.error(f"Erro ao obter coordenadas para {landmark}: {e}")
-        return [-15.7942, -47.8825]
+        return list(DEFAULT_COORDINATES)
+
+FEATURE_NAMES = {
+    'rampas': 'Rampas de acesso',
+    'elevadores': 'Elevadores acessíveis',
+    'banheiros_adaptados': 'Banheiros adaptados',
+    'plataformas_elevatorias': 'Plataformas elevatórias',
+    'pisos_tateis': 'Pisos táteis',
+    'braille': 'Sinalização em Braille',
+    'painel_tatil': 'Painéis táteis',
+    'recursos_auditivos': 'Recursos auditivos',
+    'legendas': 'Legendas',
+    'libras': 'Recursos em Libras',
+    'vagas_especiais': 'Vagas especiais',
+    'acesso_universal': 'Acesso universal',
+    'acessibilidade_digital': 'Acessibilidade digital',
+    'recursos_cognitivos': 'Recursos cognitivos',
+    'assentos_acessiveis': 'Assentos acessíveis'
+}
 
 def create_popup_html(name, classification, color, report):
-    feature_names = {
-        'rampas': 'Rampas de acesso',
-        'elevadores': 'Elevadores acessíveis',
-        'banheiros_adaptados': 'Banheiros adaptados',
-        'plataformas_elevatorias': 'Plataformas elevatórias',
-        'pisos_tateis': 'Pisos táteis',
-        'braille': 'Sinalização em Braille',
-        'painel_tatil': 'Painéis táteis',
-        'recursos_auditivos': 'Recursos auditivos',
-        'legendas': 'Legendas',
-        'libras': 'Recursos em Libras',
-        'vagas_especiais': 'Vagas especiais',
-        'acesso_universal': 'Acesso universal',
-        'acessibilidade_digital': 'Acessibilidade digital',
-        'recursos_cognitivos': 'Recursos cognitivos',
-        'assentos_acessiveis': 'Assentos acessíveis'
-    }
-    
     if not report['found_any']:
         accessibility_summary = "Nenhum recurso de acessibilidade identificado."
     else:
-        features_list = [feature_names.get(feature, feature) for feature in report['features'].keys()]
+        features_list = [FEATURE_NAMES.get(feature, feature) for feature in report['features'].keys()]
         accessibility_summary = f"Recursos de acessibilidade: {', '.join(features_list)}."
     
     popup_html = f"""
@@ -432,10 +1190,80 @@ def create_popup_html(name, classification, color, report):
     """
     return popup_html
 
-def plot_on_map(results):
-    os.makedirs("results", exist_ok=True)
-    
-    map_center = [-15.7942, -47.8825]
+# Estilo único dos pop-ups do modo geojson (no modo inline cada pop-up leva o próprio estilo)
+GEOJSON_POPUP_STYLE = """
+<style>
+    .ta-popup { width: 420px; font-family: 'Arial', sans-serif; padding: 15px; background: #fff; border-radius: 10px; box-shadow: 0 4px 8px rgba(0,0,0,0.1); }
+    .ta-popup-header { border-bottom: 2px solid #ecf0f1; padding-bottom: 10px; margin-bottom: 12px; }
+    .ta-popup h2 { margin: 0; color: #2c3e50; font-size: 1.4em; }
+    .ta-popup-class { padding: 10px; border-radius: 5px; margin: 10px 0; font-weight: bold; border-left: 5px solid; text-align: center; font-size: 1.1em; }
+    .ta-popup-summary { color: #34495e; font-size: 1em; }
+</style>
+"""
+
+# Monta os marcadores a partir de ACCESSIBILITY_DATA; o HTML do pop-up só é gerado ao clicar
+GEOJSON_MAP_SCRIPT = """
+{% macro script(this, kwargs) %}
+(function() {
+    var featureNames = {{ this.feature_names }};
+    function escapeHtml(text) {
+        return String(text).replace(/[&<>"']/g, function(c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    }
+    function icon(classification) {
+        return classification === 'Acessível' ? 'wheelchair' : classification === 'Parcialmente Acessível' ? 'exclamation-triangle' : 'ban';
+    }
+    function popupHtml(p) {
+        var summary = p.f.length
+            ? 'Recursos de acessibilidade: ' + p.f.map(function(f) { return featureNames[f] || f; }).join(', ') + '.'
+            : 'Nenhum recurso de acessibilidade identificado.';
+        return '<div class="ta-popup"><div class="ta-popup-header"><h2>' + escapeHtml(p.n) + '</h2>'
+            + '<div class="ta-popup-class" style="background-color: ' + p.k + '20; color: ' + p.k + '; border-left-color: ' + p.k + ';">'
+            + 'Classificação: ' + escapeHtml(p.c) + ' (Score: ' + p.s + ')</div></div>'
+            + '<div class="ta-popup-summary">' + escapeHtml(summary) + '</div></div>';
+    }
+    var markers = [];
+    ACCESSIBILITY_DATA.forEach(function(collection) {
+        collection.features.forEach(function(feature) {
+            var p = feature.properties;
+            var coordinates = feature.geometry.coordinates;
+            var marker = L.marker([coordinates[1], coordinates[0]], {
+                icon: L.AwesomeMarkers.icon({icon: icon(p.c), prefix: 'fa', markerColor: p.k})
+            });
+            marker.bindTooltip(p.n + ' - ' + p.c);
+            marker.bindPopup(function() { return popupHtml(p); }, {maxWidth: 450});
+            markers.push(marker);
+        });
+    });
+    var cluster = L.markerClusterGroup({chunkedLoading: true});
+    cluster.addLayers(markers);
+    {{ this._parent.get_name() }}.addLayer(cluster);
+})();
+{% endmacro %}
+"""
+
+class GeoJsonClusterLayer(MacroElement):
+    # Renderizado depois da criação do mapa (filho do folium.Map)
+    _template = Template(GEOJSON_MAP_SCRIPT)
+
+    def __init__(self):
+        super().__init__()
+        self._name = "GeoJsonClusterLayer"
+        self.feature_names = json.dumps(FEATURE_NAMES, ensure_ascii=False)
+
+def map_icon(classification):
+    return "wheelchair" if classification == "Acessível" else "exclamation-triangle" if classification == "Parcialmente Acessível" else "ban"
+
+def result_coordinates(item):
+    # Reaproveita as coordenadas já gravadas no JSON do resultado
+    coordinates = item.get('coordinates')
+    if coordinates:
+        return [coordinates['latitude'], coordinates['longitude']]
+    return get_coordinates(item['name'])
+
+def create_base_map():
+    map_center = DEFAULT_COORDINATES
     accessibility_map = folium.Map(location=map_center, zoom_start=13, tiles='cartodbpositron')
     
     font_awesome = """
@@ -443,29 +1271,6 @@ def plot_on_map(results):
     """
     accessibility_map.get_root().header.add_child(folium.Element(font_awesome))
     
-    for item in results:
-        name = item['name']
-        classification_tuple = item['classification']
-        classification = classification_tuple[0]
-        color = classification_tuple[1]
-        report = item['report']
-        
-        coords = get_coordinates(name)
-        if not coords:
-            logger.warning(f"Ignorando {name} devido à falta de coordenadas.")
-            continue
-        
-        popup_html = create_popup_html(name, classification, color, report)
-        
-        icon_choice = "wheelchair" if classification == "Acessível" else "exclamation-triangle" if classification == "Parcialmente Acessível" else "ban"
-        
-        folium.Marker(
-            location=coords,
-            popup=folium.Popup(popup_html, max_width=450),
-            icon=folium.Icon(color=color, icon=icon_choice, prefix='fa'),
-            tooltip=f"{name} - {classification}"
-        ).add_to(accessibility_map)
-    
     legend_html = """
     <div style="position: fixed; bottom: 50px; left: 50px; width: 200px; 
                 background: linear-gradient(to bottom, #ffffff, #f1f5f9); 
@@ -491,50 +1296,497 @@ def plot_on_map(results):
     </div>
     """
     accessibility_map.get_root().html.add_child(folium.Element(legend_html))
+    return accessibility_map
+
+def plot_on_map(results, mode=MAP_MODE):
+    os.makedirs("results", exist_ok=True)
+    
+    if mode == 'geojson':
+        accessibility_map = plot_geojson_map(results)
+    else:
+        accessibility_map = plot_inline_map(results)
     
     map_path = os.path.join("results", "accessibility_map.html")
     accessibility_map.save(map_path)
     logger.info(f"Mapa gerado: {map_path}")
 
-def main():
+def plot_inline_map(results):
+    accessibility_map = create_base_map()
+    
+    for item in results:
+        name = item['name']
+        classification_tuple = item['classification']
+        classification = classification_tuple[0]
+        color = classification_tuple[1]
+        report = item['report']
+        
+        coords = result_coordinates(item)
+        if not coords:
+            logger.warning(f"Ignorando {name} devido à falta de coordenadas.")
+            continue
+        
+        popup_html = create_popup_html(name, classification, color, report)
+        
+        folium.Marker(
+            location=coords,
+            popup=folium.Popup(popup_html, max_width=450),
+            icon=folium.Icon(color=color, icon=map_icon(classification), prefix='fa'),
+            tooltip=f"{name} - {classification}"
+        ).add_to(accessibility_map)
+    
+    return accessibility_map
+
+def plot_geojson_map(results):
+    # Pontos em arquivos de dados externos (results/map_data), agrupados no navegador
+    # com Leaflet.markercluster; o HTML fica pequeno independentemente do número de pontos
+    features = []
+    for item in results:
+        coords = result_coordinates(item)
+        if not coords:
+            logger.warning(f"Ignorando {item['name']} devido à falta de coordenadas.")
+            continue
+        classification, color = item['classification']
+        features.append(geojson_feature(item['name'], classification, color, item['report'], coords))
+    
+    data_files = write_map_data(features, os.path.join("results", MAP_DATA_DIR))
+    
+    accessibility_map = create_base_map()
+    root = accessibility_map.get_root()
+    for name, url in MarkerCluster.default_css:
+        root.header.add_child(folium.CssLink(url), name=name)
+    scripts = ["<script>var ACCESSIBILITY_DATA = [];</script>"]
+    scripts += [f'<script src="{url}"></script>' for _, url in MarkerCluster.default_js]
+    scripts += [f'<script src="{MAP_DATA_DIR}/{filename}"></script>' for filename in data_files]
+    root.html.add_child(folium.Element('\n'.join(scripts)))
+    root.html.add_child(folium.Element(GEOJSON_POPUP_STYLE))
+    accessibility_map.add_child(GeoJsonClusterLayer())
+    logger.info(f"Mapa com {len(features)} pontos em {len(data_files)} arquivos de dados")
+    return accessibility_map
+
+def build_report(accessibility_data):
+    report = format_report(accessibility_data)
+    classification = classify_accessibility(report)
+
+    logger.info(f"Classificação: {classification[0]} (Score: {report['score']})")
+    logger.info("Recursos encontrados:")
+    for feature, items in report['features'].items():
+        logger.info(f" - {feature}: {len(items)} itens (peso total: {sum(i['weight'] for i in items)})")
+
+    logger.info("Pontuação por Categoria:")
+    for category, score in report['categories'].items():
+        logger.info(f" - {category.title()}: {score} pontos")
+    return report, classification
+
+def map_result(name, report, classification, coordinates):
+    return {
+        'name': name,
+        'classification': classification,
+        'report': report,
+        'coordinates': {
+            'latitude': coordinates[0],
+            'longitude': coordinates[1]
+        }
+    }
+
+def source_host(item):
+    _, source = item
+    return url_host(source) if source else None
+
+# Marca, na saída da captura, uma fonte cuja URL já foi capturada para outro ponto
+SHARED_PAGE = object()
+
+class CrawlPipeline:
+    # Captura, extração, geocodificação e gravação em etapas com filas limitadas:
+    # cada fonte é capturada por um worker e os pontos seguem adiante assim que todas
+    # as suas fontes forem extraídas, sem esperar os demais
+    def __init__(self, landmarks, workers=MAX_WORKERS, fetch_mode=FETCH_MODE, source_state=None, journal=None,
+                 work_queue=None, worker=None, scheduler=None, browser_profile=BROWSER_PROFILE):
+        self.landmarks = landmarks
+        self.fetch_mode = fetch_mode
+        self.browser_profile = browser_profile
+        self.source_state = source_state
+        # Limites de capturas simultâneas e de intervalo por host
+        self.scheduler = scheduler or HostScheduler()
+        # Cada URL (normalizada) é capturada uma vez por execução; as outras fontes com a
+        # mesma URL recebem o resultado da extração da primeira
+        self._fetched_urls = set()
+        self._fetched_lock = threading.Lock()
+        self._extracted = {}
+        self._waiting = defaultdict(list)
+        # Com o diário, fontes e pontos concluídos numa execução interrompida não são refeitos
+        self.journal = journal
+        # Com a fila compartilhada, os pontos vêm das reservas deste worker em vez da lista
+        self.work_queue = work_queue
+        self.worker = worker
+        self.heartbeat = None
+        if work_queue:
+            # Várias renovações por reserva, para um atraso no heartbeat não liberar o ponto
+            self.heartbeat = Heartbeat(work_queue, worker, min(HEARTBEAT_INTERVAL, work_queue.lease_seconds / 3))
+        # Resultados pela posição no arquivo para manter a ordem original
+        self.results = {}
+        # Protege os resultados e as gravações no diário e na fila: depois de cancel(), nenhuma
+        # thread que ainda esteja terminando um item grava mais nada
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._local = threading.local()
+        self._drivers = []
+        self._drivers_lock = threading.Lock()
+        self.stages = [
+            Stage('fetch', self.fetch, workers=workers, maxsize=max(STAGE_QUEUE_SIZE, 2 * workers)),
+            # Uma thread: a extração usa CPU e concorreria pelo GIL
+            Stage('extract', self.extract, maxsize=max(STAGE_QUEUE_SIZE, 2 * workers)),
+            Stage('geocode', self.geocode),
+            Stage('write', self.write, batch_size=WRITE_BATCH_SIZE)
+        ]
+
+    def run(self):
+        if self.heartbeat:
+            self.heartbeat.start()
+        try:
+            run_pipeline(self.stages, self.work_items())
+        except BaseException:
+            self.cancel()
+            raise
+        finally:
+            for driver in self._drivers:
+                driver.quit()
+            if self.heartbeat:
+                self.heartbeat.stop()
+                # Reservas que não chegaram ao fim (erro em alguma etapa) voltam para a fila
+                held = self.heartbeat.held()
+                if held:
+                    self.work_queue.release(self.worker, held, "não concluído pelo worker")
+        return self.completed()
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+
+    def completed(self):
+        with self._lock:
+            return [self.results[index] for index in sorted(self.results)]
+
+    def claimed_batches(self):
+        # Reserva poucos pontos por vez: o put() na primeira etapa só libera quando há espaço,
+        # então nenhum worker segura mais trabalho do que consegue começar
+        while True:
+            claimed = self.work_queue.claim(self.worker, CLAIM_BATCH_SIZE)
+            if not claimed:
+                # Pontos reservados por outro worker podem voltar para a fila se ele parar
+                if not self.work_queue.leased_elsewhere(self.worker):
+                    return
+                time.sleep(min(POLL_INTERVAL, self.work_queue.lease_seconds / 3))
+                continue
+            self.heartbeat.hold(landmark['name'] for _, landmark in claimed)
+            yield claimed
+
+    def landmark_done(self, names):
+        if self.journal:
+            self.journal.record_landmarks(names)
+        if self.work_queue:
+            self.work_queue.complete(self.worker, names)
+            self.heartbeat.drop(names)
+
+    def pending_sources(self, landmarks):
+        for index, landmark in landmarks:
+            name = landmark['name']
+            if self.journal and self.journal.is_done(name):
+                saved = load_saved_result(name)
+                if saved is not None:
+                    with self._lock:
+                        self.results[index] = saved
+                    metrics.increment('landmarks_resumed')
+                    continue
+
+            job = {'index': index, 'landmark': landmark, 'items': {}, 'hashes': {}, 'changed': False}
+            pending = []
+            for source in landmark['sources']:
+                journaled = self.journal.source_result(name, source) if self.journal else None
+                if journaled is None:
+                    pending.append(source)
+                else:
+                    job['items'][source], changed, job['hashes'][source] = journaled
+                    job['changed'] = job['changed'] or changed
+                    metrics.increment('sources_resumed')
+            job['remaining'] = len(pending)
+            if not pending:
+                # Todas as fontes já estão no diário: só falta concluir o ponto
+                yield job, None
+            for source in pending:
+                yield job, source
+
+    def work_items(self):
+        # Alterna os hosts para os workers de captura não ficarem todos esperando o mesmo host
+        if not self.work_queue:
+            yield from interleave_by_host(self.pending_sources(enumerate(self.landmarks)), source_host)
+            return
+        # Na fila, só dentro de cada lote reservado: ler adiante esperaria por novas reservas
+        # (claimed_batches dorme enquanto outros workers têm pontos) segurando as já feitas
+        for claimed in self.claimed_batches():
+            yield from interleave_by_host(self.pending_sources(claimed), source_host)
+
+    def driver(self):
+        # Cada thread de captura tem o seu próprio driver, iniciado sob demanda
+        driver = getattr(self._local, 'driver', None)
+        if driver is None:
+            driver = self._local.driver = LazyDriver(self.browser_profile)
+            with self._drivers_lock:
+                self._drivers.append(driver)
+        return driver
+
+    def fetch(self, item):
+        job, source = item
+        if source is None:
+            return job, None, None, None
+        url = normalize_url(source)
+        with self._fetched_lock:
+            shared = url in self._fetched_urls
+            self._fetched_urls.add(url)
+        if shared:
+            logger.info(f"URL já capturada nesta execução, reaproveitando: {source}")
+            metrics.increment('sources_deduplicated')
+            return job, source, None, SHARED_PAGE
+        with metrics.context(landmark=job['landmark']['name'], source=source):
+            try:
+                with self.scheduler.slot(url):
+                    state, page = fetch_source(self.driver(), source, self.fetch_mode, self.source_state)
+            except Exception as e:
+                return job, source, None, e
+        return job, source, state, page
+
+    def extract(self, item):
+        # Uma thread só: _extracted e _waiting não precisam de trava
+        job, source, state, page = item
+        if source is None:
+            return self.finish_landmark(job)
+        url = normalize_url(source)
+        if page is SHARED_PAGE:
+            if url not in self._extracted:
+                # A primeira captura desta URL ainda não chegou na extração
+                self._waiting[url].append((job, source))
+                return None
+            return self.apply_source(job, source, *self._extracted[url])
+
+        self._extracted[url] = outcome = self.extract_one(job, source, state, page)
+        for waiting_job, waiting_source in self._waiting.pop(url, []):
+            output = self.apply_source(waiting_job, waiting_source, *outcome)
+            if output is not None:
+                self.stages[1].emit(output)
+        return self.apply_source(job, source, *outcome)
+
+    def extract_one(self, job, source, state, page):
+        # Retorna (itens, mudou, hash); com falha o hash é None e a fonte não vai para o diário
+        with metrics.context(landmark=job['landmark']['name'], source=source):
+            if isinstance(page, Exception):
+                source_failed(source, page)
+                return [], True, None
+            try:
+                return extract_source(source, state, page, self.source_state)
+            except Exception as e:
+                source_failed(source, e)
+                return [], True, None
+
+    def apply_source(self, job, source, items, changed, body_hash):
+        job['items'][source] = items = with_source(items, source)
+        job['hashes'][source] = body_hash
+        job['changed'] = job['changed'] or changed
+        if body_hash is not None and self.journal:
+            with self._lock:
+                if not self._cancelled:
+                    self.journal.record_source(job['landmark']['name'], source, items, changed, body_hash)
+        job['remaining'] -= 1
+        if job['remaining']:
+            return None
+        return self.finish_landmark(job)
+
+    def finish_landmark(self, job):
+        landmark = job['landmark']
+        with metrics.context(landmark=landmark['name']):
+            logger.info(f"Processando: {landmark['name']}")
+            source_hashes = {source: job['hashes'].get(source) for source in landmark['sources']}
+            if not job['changed'] and self.source_state:
+                saved = load_saved_result(landmark['name'], source_hashes)
+                if saved is not None:
+                    logger.info(f"Fontes sem alterações, reaproveitando resultado salvo: {landmark['name']}")
+                    with self._lock:
+                        if not self._cancelled:
+                            self.results[job['index']] = saved
+                            metrics.increment('landmarks')
+                            self.landmark_done([landmark['name']])
+                    return None
+            # Itens na ordem das fontes no arquivo, como na análise sequencial
+            accessibility_data = [item for source in landmark['sources'] for item in job['items'].get(source, [])]
+            report, classification = build_report(accessibility_data)
+        return job['index'], landmark, report, classification, source_hashes
+
+    def geocode(self, item):
+        index, landmark, report, classification, source_hashes = item
+        with metrics.context(landmark=landmark['name']):
+            with metrics.timer('geocoding'):
+                coordinates = get_coordinates(landmark['name'])
+        return index, map_result(landmark['name'], report, classification, coordinates), \
+            result_data(landmark['name'], report, classification, landmark['sources'], coordinates, source_hashes)
+
+    def write(self, batch):
+        # Uma transação por lote com o que já estiver na fila
+        with self._lock:
+            if self._cancelled:
+                return
+            names = [result['name'] for _, result, _ in batch]
+            start = time.perf_counter()
+            try:
+                store = get_results_store()
+                store.save_many([data for _, _, data in batch])
+                # Uma transação para o lote: o tempo entra no detalhamento de cada ponto dele
+                metrics.observe_shared('json_write', time.perf_counter() - start, names)
+                logger.info(f"{len(batch)} resultado(s) salvo(s) em {store.path}")
+                self.landmark_done(names)
+            except Exception as e:
+                logger.error(f"Erro ao salvar {len(batch)} resultado(s): {e}")
+            for index, result, _ in batch:
+                self.results[index] = result
+                with metrics.context(landmark=result['name']):
+                    metrics.increment('landmarks')
+
+def write_metrics(directory):
+    try:
+        metrics.write_json(os.path.join(directory, "metrics.json"))
+        metrics.write_prometheus(os.path.join(directory, "metrics.prom"))
+        logger.info(f"Métricas salvas em {directory}")
+    except Exception as e:
+        logger.error(f"Erro ao salvar métricas: {e}")
+
+def render_map(results, map_mode=MAP_MODE):
+    if not results:
+        logger.error("Nenhum ponto turístico foi processado.")
+        return False
+    logger.info(f"Gerando mapa interativo com {len(results)} pontos...")
+    with metrics.timer('map_render'):
+        plot_on_map(results, map_mode)
+    return True
+
+def raise_interrupt(signum, frame):
+    # SIGTERM segue o mesmo caminho do Ctrl+C: o diário e o mapa parcial são gravados
+    raise KeyboardInterrupt
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Análise de acessibilidade de pontos turísticos")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS,
+                        help=f"Número de drivers em paralelo (padrão: {MAX_WORKERS})")
+    parser.add_argument("--fetch-mode", choices=FETCH_MODES, default=FETCH_MODE,
+                        help="Captura via HTTP com fallback para Selenium (auto), só HTTP ou só Selenium")
+    parser.add_argument("--metrics-dir", default="metrics",
+                        help="Pasta dos arquivos de métricas (metrics.json e metrics.prom)")
+    parser.add_argument("--map-mode", choices=MAP_MODES, default=MAP_MODE,
+                        help="Mapa com pop-ups embutidos (inline) ou com dados GeoJSON externos e agrupamento (geojson)")
+    parser.add_argument("--gazetteer", default=GAZETTEER_PATH,
+                        help="CSV de lugares consultado antes do Nominatim (gerado com gazetteer.py --from-osm)")
+    parser.add_argument("--offline", action="store_true",
+                        help="Não consulta o Nominatim: nomes fora do gazetteer ficam no centro de Brasília")
+    parser.add_argument("--browser-profile", choices=BROWSER_PROFILES, default=BROWSER_PROFILE,
+                        help="Chrome enxuto, sem imagens, mídia, fontes e rastreadores (lean), ou completo (full)")
+    parser.add_argument("--host-concurrency", type=int, default=HOST_CONCURRENCY,
+                        help=f"Capturas simultâneas por host (padrão: {HOST_CONCURRENCY})")
+    parser.add_argument("--host-interval", type=float, default=HOST_MIN_INTERVAL,
+                        help=f"Segundos mínimos entre duas capturas no mesmo host (padrão: {HOST_MIN_INTERVAL})")
+    parser.add_argument("--queue", nargs="?", const=WORK_QUEUE_PATH, metavar="ARQUIVO",
+                        help="Modo fila: vários processos (ou máquinas, numa pasta compartilhada) dividem os pontos "
+                             f"reservando-os na fila (padrão: {WORK_QUEUE_PATH})")
+    parser.add_argument("--reset", action="store_true",
+                        help="Modo fila: começa uma nova rodada, reenfileirando também os pontos já concluídos "
+                             "(use só no primeiro worker)")
+    parser.add_argument("--worker-id", default=default_worker_id(), help="Identificação deste worker na fila")
+    parser.add_argument("--lease", type=int, default=LEASE_SECONDS,
+                        help="Segundos de reserva de um ponto sem heartbeat antes de voltar para a fila")
+    parser.add_argument("--results-db", default=RESULTS_DB_PATH,
+                        help="Base de resultados (numa pasta de rede, use o mesmo caminho em todos os workers)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Retoma a última execução interrompida, pulando fontes e pontos já concluídos")
+    parser.add_argument("--full-refresh", action="store_true",
+                        help="Ignora o estado salvo das fontes e reprocessa tudo (o estado é regravado)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
     logger.info("Iniciando análise de acessibilidade...")
+    metrics.reset()
     
     os.makedirs("results", exist_ok=True)
-    driver = setup_driver()
-    landmarks = read_tourist_file("tourist_attractions.txt")
+    landmarks = read_tourist_file(TOURIST_FILE)
     
     if not landmarks:
         logger.error("Nenhum ponto turístico encontrado no arquivo.")
-        driver.quit()
         return
     
-    results = []
-    for landmark in landmarks:
-        logger.info(f"Processando: {landmark['name']}")
-        
-        report = scrape_accessibility(driver, landmark['name'], landmark['sources'])
-        classification = classify_accessibility(report)
-        
-        logger.info(f"Classificação: {classification[0]} (Score: {report['score']})")
-        logger.info("Recursos encontrados:")
-        for feature, items in report['features'].items():
-            logger.info(f" - {feature}: {len(items)} itens (peso total: {sum(i['weight'] for i in items)})")
-        
-        logger.info("Pontuação por Categoria:")
-        for category, score in report['categories'].items():
-            logger.info(f" - {category.title()}: {score} pontos")
-        
-        json_file = save_json(landmark['name'], report, classification, landmark['sources'])
-        results.append({
-            'name': landmark['name'],
-            'classification': classification,
-            'report': report
-        })
+    configure_results_store(args.results_db, shared=args.queue is not None)
+    # Migração única dos JSON antigos de results/ para a base consolidada
+    get_results_store().migrate_from_directory()
+    
+    configure_geocoding(args.gazetteer, remote=not args.offline)
     
-    driver.quit()
-    logger.info("Gerando mapa interativo...")
-    plot_on_map(results)
+    # Estado das fontes (ETag, Last-Modified e hash) para execuções incrementais
+    source_state = SourceStateStore(ignore_existing=args.full_refresh)
+    
+    journal = None
+    work_queue = None
+    if args.queue:
+        # A fila já guarda o que foi concluído: o diário local não é usado
+        if args.resume:
+            logger.info("--resume é ignorado no modo fila (pontos concluídos já ficam marcados na fila).")
+        work_queue = WorkQueue(args.queue, args.lease)
+        work_queue.enqueue(landmarks, reset=args.reset)
+        logger.info(f"Worker {args.worker_id} usando a fila {args.queue}")
+    else:
+        if args.reset:
+            logger.info("--reset é ignorado fora do modo fila (--queue).")
+        journal = RunJournal()
+        if args.resume:
+            journal.resume(TOURIST_FILE, len(landmarks))
+        else:
+            journal.start(TOURIST_FILE, len(landmarks))
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, raise_interrupt)
+    
+    num_workers = max(1, min(args.workers, sum(len(landmark['sources']) for landmark in landmarks)))
+    logger.info(f"Iniciando {num_workers} worker(s) de captura...")
+    pipeline = CrawlPipeline(landmarks, num_workers, args.fetch_mode, source_state, journal,
+                             work_queue, args.worker_id, HostScheduler(args.host_concurrency, args.host_interval),
+                             args.browser_profile)
+    status = 'interrupted'
+    try:
+        pipeline.run()
+        status = 'completed'
+    finally:
+        source_state.close()
+        if journal:
+            journal.finish(status)
+            journal.close()
+            if status != 'completed':
+                # Mapa com o que já foi concluído; o restante fica para o --resume
+                logger.warning("Execução interrompida. Gerando o mapa com os pontos concluídos (continue com --resume).")
+                render_map(pipeline.completed(), args.map_mode)
+                write_metrics(args.metrics_dir)
+    
+    results = pipeline.completed()
+    if work_queue:
+        finished = work_queue.finished()
+        counts = work_queue.counts()
+        work_queue.close()
+        logger.info(f"Fila de trabalho: {counts['done']} concluídos, {counts['failed']} com falha, "
+                    f"{counts['queued'] + counts['leased']} pendentes; {len(results)} processados por este worker")
+        if not finished:
+            # O mapa fica para o último worker a terminar, com os resultados de todos
+            write_metrics(args.metrics_dir)
+            return
+        results = [result for result in map(load_saved_result, (landmark['name'] for landmark in landmarks)) if result]
+    
+    if not render_map(results, args.map_mode):
+        return
+    write_metrics(args.metrics_dir)
     logger.info("Análise concluída com sucesso!")
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(130)
\ No newline at end of file
@@ -0,0 +1,74 @@
+import time
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit
+
+from geocode_cache import RateLimiter
+from metrics import metrics
+
+# Limites por host: capturas simultâneas e intervalo mínimo entre o início de duas capturas
+HOST_CONCURRENCY = 2
+HOST_MIN_INTERVAL = 0.5
+# Fontes lidas à frente para alternar entre hosts (várias seguidas do mesmo host esperariam umas pelas outras)
+INTERLEAVE_WINDOW = 32
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def normalize_url(url):
+    # Mesma página com fragmentos diferentes (#:~:text=...) vira uma URL só
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or '').lower()
+    if parts.port is not None and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parts.port}"
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+def url_host(url):
+    return (urlsplit(url.strip()).hostname or '').lower()
+
+class HostScheduler:
+    def __init__(self, concurrency=HOST_CONCURRENCY, min_interval=HOST_MIN_INTERVAL):
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _limits(self, host):
+        with self._lock:
+            limits = self._hosts.get(host)
+            if limits is None:
+                limits = self._hosts[host] = (threading.Semaphore(self.concurrency), RateLimiter(self.min_interval))
+            return limits
+
+    @contextmanager
+    def slot(self, url):
+        # Espera uma vaga no host e o intervalo mínimo desde a última captura nele
+        semaphore, limiter = self._limits(url_host(url))
+        start = time.perf_counter()
+        with semaphore:
+            limiter.wait()
+            metrics.observe('host_wait', time.perf_counter() - start)
+            yield
+
+def interleave_by_host(items, host, window=INTERLEAVE_WINDOW):
+    # Reordena dentro de uma janela alternando os hosts (um item de cada por vez)
+    pending = OrderedDict()
+    size = 0
+    iterator = iter(items)
+    exhausted = False
+    while True:
+        while not exhausted and size < window:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                exhausted = True
+                break
+            pending.setdefault(host(item), deque()).append(item)
+            size += 1
+        if not pending:
+            return
+        key, queue = pending.popitem(last=False)
+        yield queue.popleft()
+        size -= 1
+        if queue:
+            pending[key] = queue
@@ -13,11 +13,23 @@ from kivy.uix.widget import Widget
 from kivy.core.window import Window
 from kivy.utils import get_color_from_hex
 from kivy.lang import Builder
-from kivy_garden.mapview import MapView, MapMarkerPopup
-from kivy.properties import ListProperty
+from kivy_garden.mapview import MapView, MapMarker, MapMarkerPopup, MapSource
+from kivy_garden.mapview.downloader import Downloader
+from kivy.core.image import Image as CoreImage
+from kivy.properties import ListProperty, StringProperty
+from kivy.clock import Clock
+from kivy.metrics import dp
+import io
 import os
-import json
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from results_store import ResultsStore, ResultsWatcher
+from search_index import SearchIndex
+from marker_clusters import MarkerClusterIndex
+from spatial_index import SpatialIndex, NEARBY_RADIUS_KM
+from tile_cache import TileCache, TILE_URL, download_tile, tms_row
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,7 +41,32 @@ ACCENT_COLOR_GREEN = get_color_from_hex('#4CAF50')
 ACCENT_COLOR_YELLOW = get_color_from_hex('#FFEB3B')
 ACCENT_COLOR_RED = get_color_from_hex('#F44336')
 
+# Relatórios completos mantidos em memória depois de abertos na tela de detalhes
+DETAIL_CACHE_SIZE = 32
+# Busca enquanto o usuário digita: espera entre teclas e número de sugestões
+SEARCH_DEBOUNCE = 0.15
+SEARCH_SUGGESTIONS = 5
+# Pontos entregues à tela principal por vez durante o carregamento
+LOAD_BATCH_SIZE = 500
+# Margem (em pixels) além da área visível em que os marcadores já são criados
+MARKER_MARGIN = 64
+MARKER_IMAGES = {
+    'green': 'marker_green.png',
+    'red': 'marker_red.png',
+    'yellow': 'marker_yellow.png'
+}
+# Botão "Perto": pontos acessíveis em volta do centro do mapa
+NEARBY_CLASSIFICATIONS = {'Acessível'}
+
 KV_CODE = """
+<ClusterMarker>:
+    Label:
+        text: root.count_text
+        center: root.center
+        size: self.texture_size
+        bold: True
+        color: app.text_color
+
 <MainScreen>:
     FloatLayout:
         canvas.before:
@@ -70,7 +107,8 @@ KV_CODE = """
                 hint_text_color: app.text_color
                 font_size: '18sp'
                 padding: [dp(15), (self.height - self.line_height) / 2]
-                size_hint_x: 0.9
+                size_hint_x: 0.75
+                on_text: root.on_search_text(self.text)
                 on_text_validate: root.search_location(self.text)
 
             Button:
@@ -85,14 +123,30 @@ KV_CODE = """
                     size: dp(30), dp(30)
                     color: app.text_color
 
+            Button:
+                text: 'Perto'
+                background_normal: ''
+                background_color: app.secondary_color
+                color: app.text_color
+                size_hint_x: 0.15
+                on_release: root.show_nearby()
+
         MapView:
             id: mapview
             size_hint: (1, 0.6)
             pos_hint: {'x': 0, 'y': 0}
+            map_source: app.map_source
             zoom: 12
             lat: -15.793889
             lon: -47.882778
 
+        BoxLayout:
+            id: suggestions
+            orientation: 'vertical'
+            size_hint: (0.8, None)
+            height: self.minimum_height
+            pos_hint: {'center_x': 0.5, 'top': 0.45}
+
 <DetailScreen>:
     square_color: [1, 1, 1, 1]
     FloatLayout:
@@ -280,6 +334,7 @@ KV_CODE = """
                     id: mapview_details
                     size_hint: (1, 0.6)
                     pos_hint: {'center_x': 0.5, 'center_y': 0.4}
+                    map_source: app.map_source
                     zoom: 12
                     lat: -15.793889
                     lon: -47.882778
@@ -336,75 +391,296 @@ KV_CODE = """
 
 Builder.load_string(KV_CODE)
 
+class DetailCache:
+    # Cache LRU dos relatórios completos, carregados sob demanda da base de resultados
+    def __init__(self, loader, max_size=DETAIL_CACHE_SIZE):
+        self.loader = loader
+        self.max_size = max_size
+        self._items = OrderedDict()
+
+    def get(self, name):
+        if name in self._items:
+            self._items.move_to_end(name)
+            return self._items[name]
+        point = self.loader(name)
+        if point is not None:
+            self._items[name] = point
+            if len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return point
+
+    def invalidate(self, name=None):
+        if name is None:
+            self._items.clear()
+        else:
+            self._items.pop(name, None)
+
+_marker_sources = {}
+
+def marker_source(color):
+    # os.path.exists uma vez por cor, não uma vez por marcador
+    if color not in _marker_sources:
+        marker_image = MARKER_IMAGES.get(color, 'marker_red.png')
+        if os.path.exists(marker_image):
+            _marker_sources[color] = marker_image
+        else:
+            logger.warning(f"Imagem do marcador '{marker_image}' não encontrada. Usando marcador padrão.")
+            _marker_sources[color] = None
+    return _marker_sources[color]
+
+class CachedTileSource(MapSource):
+    # Lê os tiles do cache local (MBTiles) e só vai à rede para os que faltam
+    def __init__(self, cache, url=TILE_URL, **kwargs):
+        super().__init__(url=url, cache_key='osm-cache', attribution=MapSource.attribution_osm, **kwargs)
+        self.cache = cache
+
+    def fill_tile(self, tile):
+        if tile.state == "done":
+            return
+        Downloader.instance(self.cache_dir).submit(self._load_tile, tile)
+
+    def _load_tile(self, tile):
+        if tile.state == "done":
+            return
+        # O MapView numera as linhas de baixo para cima, como o MBTiles
+        data = self.cache.get(tile.zoom, tile.tile_x, tile.tile_y)
+        if data is None:
+            if not self.cache.should_download(tile.zoom, tile.tile_x, tile.tile_y):
+                # Falhou há pouco: fica sem imagem até o fim da espera, sem voltar à rede
+                tile.state = "done"
+                return
+            try:
+                data = download_tile(tile.zoom, tile.tile_x, tms_row(tile.zoom, tile.tile_y), self.url)
+            except Exception as e:
+                delay = self.cache.download_failed(tile.zoom, tile.tile_x, tile.tile_y)
+                logger.warning(f"Tile {tile.zoom}/{tile.tile_x}/{tile.tile_y} indisponível "
+                               f"(nova tentativa em {delay} s): {e}")
+                tile.state = "done"
+                return
+            self.cache.set(tile.zoom, tile.tile_x, tile.tile_y, data)
+        return self._load_tile_done, (tile, data)
+
+    def _load_tile_done(self, tile, data):
+        image = CoreImage(io.BytesIO(data), ext='png')
+        tile.texture = image.texture
+        tile.state = "need-animation"
+
+class ClusterMarker(MapMarker):
+    # Marcador reaproveitável: representa um ponto ou um grupo de pontos (com a contagem)
+    count_text = StringProperty('')
+    default_source = MapMarker.source.defaultvalue
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.cluster = None
+        self.point_data = None
+        self.marker_color = None
+        self.popup = None
+
+    def is_showing(self, cluster):
+        # Compara também o ponto e a cor: uma atualização da base pode mudar só a classificação
+        return (self.cluster is cluster and self.point_data is cluster.point and self.marker_color == cluster.color
+                and self.lat == cluster.lat and self.lon == cluster.lon
+                and self.count_text == ('' if cluster.count == 1 else str(cluster.count)))
+
+    def show(self, cluster):
+        self.cluster = cluster
+        self.point_data = cluster.point
+        self.lat = cluster.lat
+        self.lon = cluster.lon
+        self.marker_color = cluster.color
+        self.source = marker_source(self.marker_color) or self.default_source
+        self.count_text = '' if cluster.count == 1 else str(cluster.count)
+        self.hide_popup()
+
+    def show_popup(self):
+        # O pop-up só é criado no primeiro toque e reaproveitado depois
+        if self.popup is None:
+            self.popup = Label(
+                size_hint=(None, None),
+                size=(200, 100),
+                color=(1, 1, 1, 1),
+                text_size=(180, None)
+            )
+        self.popup.text = f"{self.point_data['name']}\nClassificação: {self.point_data['classification']}"
+        self.popup.center_x = self.center_x
+        self.popup.y = self.top
+        if self.popup.parent is None:
+            self.add_widget(self.popup)
+
+    def hide_popup(self):
+        if self.popup is not None and self.popup.parent is not None:
+            self.remove_widget(self.popup)
+
+class MarkerPool:
+    def __init__(self, on_release):
+        self.on_release = on_release
+        self._free = []
+
+    def acquire(self):
+        if self._free:
+            return self._free.pop()
+        marker = ClusterMarker()
+        marker.bind(on_release=self.on_release)
+        return marker
+
+    def release(self, marker):
+        marker.hide_popup()
+        marker.cluster = None
+        marker.point_data = None
+        self._free.append(marker)
+
 class MainScreen(Screen):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Marcadores visíveis por grupo; os que saem da tela voltam para o pool
+        self._marker_pool = MarkerPool(self.marker_clicked)
+        self._visible_markers = {}
+        self._marker_trigger = Clock.create_trigger(self.refresh_markers)
+        self._mapview_bound = False
+        # A busca roda fora da thread da interface; só o resultado da última consulta é exibido
+        self._search_executor = ThreadPoolExecutor(max_workers=1)
+        self._search_trigger = None
+        self._search_sequence = 0
+        self._ignore_text = False
+
+    def on_search_text(self, text):
+        if self._ignore_text:
+            return
+        if self._search_trigger is not None:
+            self._search_trigger.cancel()
+        self._search_sequence += 1
+        if not text.strip():
+            self.show_suggestions([])
+            return
+        sequence = self._search_sequence
+        self._search_trigger = Clock.schedule_once(lambda dt: self.start_search(text, sequence), SEARCH_DEBOUNCE)
+
+    def start_search(self, text, sequence):
+        app = App.get_running_app()
+        if app.search_index is None:
+            return
+        future = self._search_executor.submit(app.search_index.search, text, SEARCH_SUGGESTIONS)
+        future.add_done_callback(lambda f: Clock.schedule_once(lambda dt: self.on_search_done(f, sequence)))
+
+    def on_search_done(self, future, sequence):
+        if sequence != self._search_sequence:
+            return
+        try:
+            names = future.result()
+        except Exception as e:
+            logger.error(f"Erro na busca: {e}")
+            names = []
+        self.show_suggestions(names)
+
+    def show_suggestions(self, names):
+        suggestions = self.ids.suggestions
+        suggestions.clear_widgets()
+        for name in names:
+            button = Button(
+                text=name,
+                size_hint_y=None,
+                height=dp(36),
+                background_normal='',
+                background_color=SECONDARY_COLOR,
+                color=TEXT_COLOR
+            )
+            button.bind(on_release=lambda button: self.open_details(button.text))
+            suggestions.add_widget(button)
+
+    def open_details(self, name):
+        self.show_suggestions([])
+        detail_screen = self.manager.get_screen('detail_screen')
+        detail_screen.load_details(location_name=name)
+        self.manager.current = 'detail_screen'
+
     def search_location(self, text):
         logger.info(f"Pesquisando por: {text}")
         app = App.get_running_app()
-        search_text = text.lower().strip()
-        
-        found_name = None
-        for location_name in app.locations_data:
-            if search_text in location_name.lower():
-                found_name = location_name
-                break
-        
+        if app.search_index is None:
+            # As sugestões aparecem quando o índice ficar pronto (on_search_index_ready)
+            logger.info("Índice de busca ainda carregando.")
+            return
+        self._search_sequence += 1
+
+        matches = app.search_index.search(text, 1)
+        found_name = matches[0] if matches else None
+
         if found_name:
-            detail_screen = self.manager.get_screen('detail_screen')
-            detail_screen.load_details(location_name=found_name)
-            self.manager.current = 'detail_screen'
+            self.open_details(found_name)
         else:
             logger.warning(f"Local '{text}' não encontrado.")
+            self.show_suggestions([])
+            self._ignore_text = True
             self.ids.search_input.text = f"'{text}' não encontrado!"
+            self._ignore_text = False
+
+    def show_nearby(self):
+        app = App.get_running_app()
+        if app.spatial_index is None:
+            logger.info("Índice espacial ainda carregando.")
+            return
+        mapview = self.ids.mapview
+        found = app.spatial_index.nearest(
+            mapview.lat, mapview.lon, SEARCH_SUGGESTIONS,
+            classifications=NEARBY_CLASSIFICATIONS, max_km=NEARBY_RADIUS_KM
+        )
+        if not found:
+            logger.info(f"Nenhum ponto acessível a até {NEARBY_RADIUS_KM} km do centro do mapa.")
+        self._search_sequence += 1
+        self.show_suggestions([point['name'] for _, point in found])
     
     def on_pre_enter(self):
         mapview = self.ids.mapview
-        app = App.get_running_app()
-        mapview.map_source = "osm"
-
-        for widget in mapview.children[:]:
-            if isinstance(widget, MapMarkerPopup):
-                mapview.remove_widget(widget)
-
-        marker_images = {
-            'green': 'marker_green.png',
-            'red': 'marker_red.png',
-            'yellow': 'marker_yellow.png'
-        }
-
-        for point in app.points_data:
-            lat = point.get('coordinates', {}).get('latitude')
-            lon = point.get('coordinates', {}).get('longitude')
-            if lat is None or lon is None:
-                logger.warning(f"Coordenadas inválidas para {point.get('name', 'desconhecido')}")
-                continue
-
-            color = point.get('color', 'red')
-            marker_image = marker_images.get(color, 'marker_red.png')
-            
-            if not os.path.exists(marker_image):
-                logger.warning(f"Imagem do marcador '{marker_image}' não encontrada. Usando marcador padrão.")
-                marker = MapMarkerPopup(lat=lat, lon=lon)
-            else:
-                marker = MapMarkerPopup(lat=lat, lon=lon, source=marker_image)
-
-            popup = Label(
-                text=f"{point['name']}\\nClassificação: {point['classification']}",
-                size_hint=(None, None),
-                size=(200, 100),
-                color=(1, 1, 1, 1),
-                text_size=(180, None)
-            )
-            marker.add_widget(popup)
-
-            marker.point_data = point
+        if not self._mapview_bound:
+            mapview.bind(on_map_relocated=lambda *args: self._marker_trigger())
+            self._mapview_bound = True
+        self.refresh_markers()
 
-            marker.bind(on_release=self.marker_clicked)
-
-            mapview.add_widget(marker)
-            logger.info(f"Marcador adicionado: {point['name']} ({lat}, {lon}) com cor {color}")
+    def refresh_markers(self, *args):
+        # Só os grupos dentro da área visível (mais uma margem) viram widgets
+        app = App.get_running_app()
+        if app.marker_index is None:
+            return
+        mapview = self.ids.mapview
+        clusters = app.marker_index.visible_clusters(mapview.zoom, mapview.get_bbox(dp(MARKER_MARGIN)))
+        visible = {cluster.key: cluster for cluster in clusters}
+
+        for key in list(self._visible_markers):
+            if key not in visible:
+                marker = self._visible_markers.pop(key)
+                mapview.remove_marker(marker)
+                self._marker_pool.release(marker)
+
+        for key, cluster in visible.items():
+            marker = self._visible_markers.get(key)
+            if marker is None:
+                marker = self._marker_pool.acquire()
+                marker.show(cluster)
+                self._visible_markers[key] = marker
+                mapview.add_marker(marker)
+            elif not marker.is_showing(cluster):
+                # Sai e volta pela API pública do MapView: add_marker recalcula a posição
+                # (e a ordem por latitude) do marcador
+                mapview.remove_marker(marker)
+                marker.show(cluster)
+                mapview.add_marker(marker)
+
+    def on_points_loaded(self):
+        self._marker_trigger()
+
+    def on_search_index_ready(self):
+        # Consulta digitada antes de o índice ficar pronto
+        self.on_search_text(self.ids.search_input.text)
 
     def marker_clicked(self, marker):
-        app = App.get_running_app()
+        mapview = self.ids.mapview
+        if marker.point_data is None:
+            # Grupo: aproxima o mapa em vez de abrir um ponto
+            mapview.center_on(marker.lat, marker.lon)
+            mapview.zoom = min(mapview.zoom + 2, mapview.map_source.max_zoom)
+            return
+        marker.show_popup()
         detail_screen = self.manager.get_screen('detail_screen')
         detail_screen.load_details(marker.point_data['name'])
         self.manager.current = 'detail_screen'
@@ -412,10 +688,12 @@ class MainScreen(Screen):
 class DetailScreen(Screen):
     square_color = ListProperty([1, 1, 1, 1])
     current_marker = False
+    location_name = None
 
     def load_details(self, location_name):
         app = App.get_running_app()
-        point = next((p for p in app.points_data if p['name'] == location_name), None)
+        self.location_name = location_name
+        point = app.get_point(location_name)
 
         if not point:
             self.ids.report_label.text = f"Dados para '{location_name}' não encontrados."
@@ -444,16 +722,9 @@ class DetailScreen(Screen):
             logger.warning(f"Coordenadas inválidas para {location_name}")
             return
 
-        marker_images = {
-            'green': 'marker_green.png',
-            'red': 'marker_red.png',
-            'yellow': 'marker_yellow.png'
-        }
         color = point.get('color', 'red')
-        marker_image = marker_images.get(color, 'marker_red.png')
-
-        if not os.path.exists(marker_image):
-            logger.warning(f"Imagem do marcador '{marker_image}' não encontrada. Usando marcador padrão.")
+        marker_image = marker_source(color)
+        if marker_image is None:
             marker = MapMarkerPopup(lat=lat, lon=lon)
         else:
             marker = MapMarkerPopup(lat=lat, lon=lon, source=marker_image)
@@ -484,6 +755,10 @@ class DetailScreen(Screen):
             self.square_color = [1, 1, 1, 1]
             logger.warning(f"Score inválido para {location_name}: {score}")
 
+    def on_results_changed(self, names):
+        if self.location_name in names:
+            self.load_details(self.location_name)
+
     def search_location(self, text):
         logger.info(f"Pesquisando (na tela de detalhes) por: {text}")
         main_screen = self.manager.get_screen('main_screen')
@@ -491,8 +766,6 @@ class DetailScreen(Screen):
         self.manager.current = 'main_screen'
 
 class TurismoAcessivelApp(App):
-    locations_data = []
-
     primary_color = PRIMARY_COLOR
     secondary_color = SECONDARY_COLOR
     text_color = TEXT_COLOR
@@ -500,47 +773,122 @@ class TurismoAcessivelApp(App):
     accent_color_yellow = ACCENT_COLOR_YELLOW
     accent_color_red = ACCENT_COLOR_RED
 
-    points_data = []
+    results_store = None
+    detail_cache = None
+    search_index = None
+    marker_index = None
+    spatial_index = None
+    map_source = None
+    results_watcher = None
 
     def build(self):
         self.title = 'Turismo Acessível DF'
-        self.load_data_from_json()
-        self.load_data_from_txt()
+        self.map_source = CachedTileSource(TileCache())
+        self.marker_index = MarkerClusterIndex()
         sm = ScreenManager()
         sm.add_widget(MainScreen(name='main_screen'))
         sm.add_widget(DetailScreen(name='detail_screen'))
+        # A janela aparece logo; os dados chegam em lotes pela thread de carregamento
+        threading.Thread(target=self.load_data, name="carregamento", daemon=True).start()
         return sm
-    
+
+    def load_data(self):
+        # Roda fora da thread da interface: tudo que mexe em widgets passa pelo Clock
+        names = self.load_data_from_txt()
+        self.file_names = set(names)
+        store_names = []
+        if self.open_results_store():
+            # Revisão lida antes dos dados: o que for gravado durante o carregamento chega pelo observador
+            revision = self.results_store.revision()
+            store_names = self.results_store.names()
+            names += store_names
+        search_index = SearchIndex(names)
+        Clock.schedule_once(lambda dt: self.on_search_index_ready(search_index))
+
+        if self.results_store is None:
+            return
+        loaded = []
+        for batch in self.results_store.iter_summaries(LOAD_BATCH_SIZE):
+            for point in batch:
+                self.marker_index.add(point)
+            loaded.extend(batch)
+            Clock.schedule_once(lambda dt: self.on_points_loaded())
+        logger.info(f"{len(loaded)} pontos carregados de {self.results_store.path}.")
+        # Montado antes do observador começar, que passa a atualizá-lo com add/remove
+        self.spatial_index = SpatialIndex(loaded)
+
+        # O observador recebe o índice de busca já montado: self.search_index só é atribuído
+        # pelo Clock (on_search_index_ready) e ainda pode ser None na primeira mudança
+        self.results_watcher = ResultsWatcher(
+            self.results_store, store_names, revision,
+            lambda updated, removed: self.on_store_changed(updated, removed, search_index)
+        )
+        self.results_watcher.start()
+
+    def on_store_changed(self, updated, removed, search_index):
+        # Thread do observador: atualiza os índices aqui e só o resto na thread da interface
+        for point in updated:
+            self.marker_index.add(point)
+            self.spatial_index.add(point)
+        for name in removed:
+            self.marker_index.remove(name)
+            self.spatial_index.remove(name)
+            if name not in self.file_names:
+                search_index.remove(name)
+        search_index.add_many(point['name'] for point in updated)
+        Clock.schedule_once(lambda dt: self.on_results_changed(updated, removed))
+
+    def on_results_changed(self, updated, removed):
+        names = [point['name'] for point in updated] + removed
+        for name in names:
+            self.detail_cache.invalidate(name)
+        self.root.get_screen('main_screen').on_points_loaded()
+        self.root.get_screen('detail_screen').on_results_changed(names)
+
+    def on_stop(self):
+        if self.results_watcher is not None:
+            self.results_watcher.stop()
+
+    def on_search_index_ready(self, search_index):
+        self.search_index = search_index
+        self.root.get_screen('main_screen').on_search_index_ready()
+
+    def on_points_loaded(self):
+        self.root.get_screen('main_screen').on_points_loaded()
+
     def load_data_from_txt(self):
         file_path = 'tourist_attractions.txt'
+        names = []
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 for line in f:
                     line = line.strip()
                     if line:
-                        self.locations_data.append(line.split('|')[0])
-            logger.info(f"Dados carregados de {file_path}: {len(self.locations_data)} locais encontrados.")
+                        names.append(line.split('|')[0])
+            logger.info(f"Dados carregados de {file_path}: {len(names)} locais encontrados.")
         except FileNotFoundError:
             logger.warning(f"Arquivo '{file_path}' não encontrado. A busca não funcionará.")
+        return names
 
-    def load_data_from_json(self):
-        folder = 'results'
-        self.points_data = []
-        if not os.path.exists(folder):
-            logger.warning(f"Pasta {folder} não encontrada.")
-            return
-        
-        for filename in os.listdir(folder):
-            if filename.endswith('.json'):
-                filepath = os.path.join(folder, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        self.points_data.append(data)
-                        self.locations_data.append(data['name'])
-                except Exception as e:
-                    logger.error(f"Erro ao ler {filename}: {e}")
-        logger.info(f"{len(self.points_data)} pontos carregados da pasta {folder}.")
+    def open_results_store(self):
+        try:
+            self.results_store = ResultsStore()
+            # Na primeira execução, importa os JSON antigos da pasta results/
+            self.results_store.migrate_from_directory()
+            # Na abertura só o resumo (nome, coordenadas, cor e classificação);
+            # o relatório completo é buscado ao abrir a tela de detalhes
+            self.detail_cache = DetailCache(self.results_store.get)
+        except Exception as e:
+            logger.error(f"Erro ao abrir a base de resultados: {e}")
+            self.results_store = None
+            return False
+        return True
+
+    def get_point(self, name):
+        # Sem a base de resultados não há pontos (nem o cache de detalhes)
+        if self.detail_cache is None:
+            return None
+        return self.detail_cache.get(name)
 
 if __name__ == '__main__':
     TurismoAcessivelApp().run()
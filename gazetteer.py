@@ -0,0 +1,229 @@
+import os
+import bz2
+import csv
+import sys
+import gzip
+import math
+import logging
+import argparse
+from collections import defaultdict
+import xml.etree.ElementTree as ET
+
+from search_index import normalize_text, trigrams
+
+logger = logging.getLogger(__name__)
+
+# Lugares com nome e coordenadas (CSV: name,latitude,longitude[,alt_names separados por ;])
+GAZETTEER_PATH = os.path.join("base_de_dados", "gazetteer.csv")
+# Semelhança mínima (Dice sobre trigramas) para aceitar um nome aproximado
+FUZZY_MIN_SIMILARITY = 0.8
+# Trigramas presentes em mais nomes que isso não servem para escolher candidatos
+MAX_TRIGRAM_POSTINGS = 5000
+OSM_NAME_TAGS = ('name', 'name:pt', 'official_name', 'alt_name', 'short_name', 'old_name')
+# Elementos do OSM que viram lugares (ruas e limites ficam de fora)
+OSM_PLACE_KEYS = ('tourism', 'historic', 'amenity', 'leisure', 'building', 'place', 'natural', 'man_made')
+
+def name_trigrams(normalized):
+    grams = set()
+    for token in normalized.split():
+        grams |= trigrams(token)
+    return grams
+
+def numbers(normalized):
+    # Números no nome ("Quadra 1" x "Quadra 10") precisam ser iguais mesmo na busca aproximada
+    return frozenset(token for token in normalized.split() if token.isdigit())
+
+def distance_km(a, b):
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(h))
+
+class Gazetteer:
+    # Busca em memória: nome normalizado exato e, se não houver, trigramas do nome inteiro.
+    # Com vários lugares de mesmo nome, vence o mais próximo de center.
+    def __init__(self, places=(), center=None, min_similarity=FUZZY_MIN_SIMILARITY):
+        self.center = center
+        self.min_similarity = min_similarity
+        self._names = []
+        self._coordinates = []
+        self._grams = []
+        self._exact = defaultdict(list)
+        self._trigrams = defaultdict(list)
+        for names, lat, lon in places:
+            self.add(names, lat, lon)
+
+    def __len__(self):
+        return len(self._coordinates)
+
+    def add(self, names, lat, lon):
+        place_id = len(self._coordinates)
+        self._coordinates.append((lat, lon))
+        self._names.append(names[0])
+        for name in names:
+            normalized = normalize_text(name)
+            if not normalized or place_id in self._exact[normalized]:
+                continue
+            self._exact[normalized].append(place_id)
+            entry = len(self._grams)
+            grams = name_trigrams(normalized)
+            self._grams.append((place_id, len(grams), numbers(normalized)))
+            for gram in grams:
+                self._trigrams[gram].append(entry)
+
+    def _closest(self, place_ids):
+        if self.center is None or len(place_ids) == 1:
+            return place_ids[0]
+        return min(place_ids, key=lambda place_id: distance_km(self.center, self._coordinates[place_id]))
+
+    def lookup(self, name):
+        # Retorna (nome_encontrado, [lat, lon], semelhança) ou None
+        normalized = normalize_text(name)
+        if not normalized:
+            return None
+        place_ids = self._exact.get(normalized)
+        if place_ids:
+            place_id = self._closest(place_ids)
+            return self._names[place_id], list(self._coordinates[place_id]), 1.0
+
+        grams = name_trigrams(normalized)
+        query_numbers = numbers(normalized)
+        counts = defaultdict(int)
+        for gram in grams:
+            postings = self._trigrams.get(gram, ())
+            if len(postings) <= MAX_TRIGRAM_POSTINGS:
+                for entry in postings:
+                    counts[entry] += 1
+        best = {}
+        for entry, count in counts.items():
+            place_id, size, entry_numbers = self._grams[entry]
+            if entry_numbers != query_numbers:
+                continue
+            similarity = 2 * count / (len(grams) + size)
+            if similarity >= self.min_similarity and similarity > best.get(place_id, 0.0):
+                best[place_id] = similarity
+        if not best:
+            return None
+        top = max(best.values())
+        place_id = self._closest([place_id for place_id, similarity in best.items() if similarity == top])
+        return self._names[place_id], list(self._coordinates[place_id]), top
+
+def read_csv(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                lat = float(row['latitude'])
+                lon = float(row['longitude'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            names = [row.get('name', '').strip()]
+            names += [alt.strip() for alt in (row.get('alt_names') or '').split(';')]
+            names = [name for name in names if name]
+            if names:
+                yield names, lat, lon
+
+def load_gazetteer(path=GAZETTEER_PATH, center=None):
+    gazetteer = Gazetteer(read_csv(path), center)
+    logger.info(f"Gazetteer carregado de {path}: {len(gazetteer)} lugares")
+    return gazetteer
+
+def open_osm(path):
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+def iter_osm_elements(path, tags=('node', 'way')):
+    with open_osm(path) as f:
+        context = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+        for event, element in context:
+            if event != 'end' or element.tag not in ('node', 'way', 'relation'):
+                continue
+            if element.tag in tags:
+                yield element
+            # Descarta os elementos já lidos para a memória não crescer com o extrato
+            root.clear()
+
+def osm_names(element):
+    tags = {tag.get('k'): tag.get('v') for tag in element.iter('tag')}
+    if not any(key in tags for key in OSM_PLACE_KEYS):
+        return []
+    names = []
+    for key in OSM_NAME_TAGS:
+        for value in (tags.get(key) or '').split(';'):
+            value = value.strip()
+            if value and value not in names:
+                names.append(value)
+    return names
+
+def read_osm(path):
+    # Extrato .osm (XML, opcionalmente .bz2/.gz). Duas passadas: as vias com nome primeiro,
+    # para guardar só as coordenadas dos nós que elas usam (o centro da via é a média dos nós).
+    ways = []
+    needed = set()
+    for element in iter_osm_elements(path, ('way',)):
+        names = osm_names(element)
+        if names:
+            refs = [int(nd.get('ref')) for nd in element.iter('nd')]
+            ways.append((names, refs))
+            needed.update(refs)
+
+    coordinates = {}
+    for element in iter_osm_elements(path, ('node',)):
+        node_id = int(element.get('id'))
+        lat, lon = float(element.get('lat')), float(element.get('lon'))
+        if node_id in needed:
+            coordinates[node_id] = (lat, lon)
+        names = osm_names(element)
+        if names:
+            yield names, lat, lon
+
+    for names, refs in ways:
+        points = [coordinates[ref] for ref in refs if ref in coordinates]
+        if points:
+            yield names, sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points)
+
+def write_csv(places, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name', 'latitude', 'longitude', 'alt_names'])
+        for names, lat, lon in places:
+            writer.writerow([names[0], f"{lat:.7f}", f"{lon:.7f}", ';'.join(names[1:])])
+            count += 1
+    return count
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gazetteer local para geocodificação sem o Nominatim")
+    parser.add_argument("names", nargs="*", help="Nomes a procurar no gazetteer")
+    parser.add_argument("--gazetteer", default=GAZETTEER_PATH, help="Arquivo CSV do gazetteer")
+    parser.add_argument("--from-osm", metavar="EXTRATO",
+                        help="Gera o CSV a partir de um extrato do OpenStreetMap (.osm, .osm.bz2 ou .osm.gz)")
+    parser.add_argument("--near", metavar="LAT,LON",
+                        help="Com vários lugares de mesmo nome, escolhe o mais próximo deste ponto")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args(argv)
+    if args.from_osm:
+        count = write_csv(read_osm(args.from_osm), args.gazetteer)
+        logger.info(f"{count} lugares gravados em {args.gazetteer}")
+    if args.names:
+        center = tuple(float(value) for value in args.near.split(',')) if args.near else None
+        gazetteer = load_gazetteer(args.gazetteer, center)
+        for name in args.names:
+            found = gazetteer.lookup(name)
+            if found:
+                match, (lat, lon), similarity = found
+                print(f"{name}: {lat:.6f}, {lon:.6f} ({match}, semelhança {similarity:.2f})")
+            else:
+                print(f"{name}: não encontrado")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+# Configurações do cache de geocodificação
+CACHE_PATH = os.path.join("cache", "geocode.sqlite")
+CACHE_TTL = 90 * 24 * 3600
+NEGATIVE_CACHE_TTL = 7 * 24 * 3600
+# Política de uso do Nominatim: no máximo 1 requisição por segundo
+MIN_REQUEST_INTERVAL = 1.0
+
+def normalize_name(name):
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    return re.sub(r'\s+', ' ', name).strip().casefold()
+
+class RateLimiter:
+    def __init__(self, min_interval=MIN_REQUEST_INTERVAL):
+        self.min_interval = min_interval
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        # Serializa as chamadas entre threads respeitando o intervalo mínimo
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            if delay > 0:
+                time.sleep(delay)
+                now = time.monotonic()
+            self._next_time = now + self.min_interval
+
+class GeocodeCache:
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, negative_ttl=NEGATIVE_CACHE_TTL):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocode (
+                name TEXT NOT NULL,
+                variant TEXT NOT NULL,
+                latitude REAL,
+                longitude REAL,
+                found INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (name, variant)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, name, variant):
+        # Retorna (em_cache, coordenadas); coordenadas None indica resultado negativo
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT latitude, longitude, found, updated_at FROM geocode WHERE name = ? AND variant = ?",
+                (normalize_name(name), variant)
+            ).fetchone()
+
+        if row is None:
+            return False, None
+
+        latitude, longitude, found, updated_at = row
+        ttl = self.ttl if found else self.negative_ttl
+        if time.time() - updated_at > ttl:
+            return False, None
+        return True, ([latitude, longitude] if found else None)
+
+    def set(self, name, variant, coordinates):
+        found = coordinates is not None
+        latitude, longitude = coordinates if found else (None, None)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode (name, variant, latitude, longitude, found, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_name(name), variant, latitude, longitude, int(found), time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,87 @@
+import os
+import json
+import math
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Dados do mapa web divididos em arquivos por célula da grade (em graus), para que uma
+# mudança em poucos pontos reescreva só as células afetadas. 0,01° (~1 km): com células
+# maiores, todos os pontos de Brasília caem no mesmo arquivo
+MAP_DATA_DIR = "map_data"
+MAP_DATA_CELL_DEGREES = 0.01
+MANIFEST_NAME = "manifest.json"
+# Os arquivos são carregados com <script src>, que funciona também ao abrir o HTML direto do disco (file://)
+CHUNK_TEMPLATE = "ACCESSIBILITY_DATA.push({data});\n"
+
+def geojson_feature(name, classification, color, report, coordinates):
+    # Propriedades curtas: o pop-up é montado no navegador, só quando o marcador é clicado
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [round(coordinates[1], 6), round(coordinates[0], 6)]},
+        'properties': {
+            'n': name,
+            'c': classification,
+            'k': color,
+            's': report['score'],
+            'f': list(report['features'].keys())
+        }
+    }
+
+def cell_key(feature, cell_degrees=MAP_DATA_CELL_DEGREES):
+    lon, lat = feature['geometry']['coordinates']
+    return f"{math.floor(lat / cell_degrees)}_{math.floor(lon / cell_degrees)}"
+
+def cell_fingerprint(cell_features):
+    # Hash do conteúdo da célula sem montar o JSON (inclui o modelo do arquivo, para que uma
+    # mudança de formato regrave tudo)
+    content = repr([
+        (feature['geometry']['coordinates'], sorted(feature['properties'].items()))
+        for feature in cell_features
+    ])
+    return hashlib.sha256((CHUNK_TEMPLATE + content).encode('utf-8')).hexdigest()
+
+def write_map_data(features, directory, cell_degrees=MAP_DATA_CELL_DEGREES):
+    # Grava uma FeatureCollection por célula e retorna os nomes dos arquivos (ordenados).
+    # O manifesto guarda o hash de cada célula; só as que mudaram são serializadas e regravadas.
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+
+    cells = {}
+    for feature in features:
+        cells.setdefault(cell_key(feature, cell_degrees), []).append(feature)
+
+    new_manifest = {}
+    written = 0
+    for key, cell_features in sorted(cells.items()):
+        filename = f"points_{key}.js"
+        cell_features.sort(key=lambda feature: feature['properties']['n'])
+        digest = cell_fingerprint(cell_features)
+        new_manifest[filename] = digest
+        path = os.path.join(directory, filename)
+        if manifest.get(filename) != digest or not os.path.exists(path):
+            collection = {'type': 'FeatureCollection', 'features': cell_features}
+            content = CHUNK_TEMPLATE.format(data=json.dumps(collection, ensure_ascii=False, separators=(',', ':')))
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            written += 1
+
+    removed = 0
+    for filename in manifest:
+        if filename not in new_manifest:
+            try:
+                os.remove(os.path.join(directory, filename))
+                removed += 1
+            except FileNotFoundError:
+                pass
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(new_manifest, f, indent=4)
+    logger.info(f"Dados do mapa: {len(new_manifest)} arquivos ({written} regravados, {removed} removidos) em {directory}")
+    return sorted(new_manifest)
@@ -0,0 +1,160 @@
+import math
+import threading
+from collections import Counter
+
+TILE_SIZE = 256
+# Tamanho (em pixels na tela) da célula de agrupamento dos marcadores
+CLUSTER_CELL_PIXELS = 64
+MAX_ZOOM = 19
+MAX_LATITUDE = 85.0511
+
+def project(lat, lon, zoom):
+    # Web Mercator: coordenadas em pixels no nível de zoom dado (y cresce para o sul)
+    size = TILE_SIZE * (2 ** zoom)
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    sin_lat = math.sin(math.radians(lat))
+    x = (lon + 180.0) / 360.0 * size
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * size
+    return x, y
+
+def point_coordinates(point):
+    coordinates = point.get('coordinates') or {}
+    lat = coordinates.get('latitude')
+    lon = coordinates.get('longitude')
+    if lat is None or lon is None:
+        return None
+    return lat, lon
+
+class Cluster:
+    # Somas e contagem de cores mantidas a cada inserção/remoção (grupos podem ter milhares de pontos)
+    def __init__(self, key):
+        self.key = key
+        self.points = {}
+        self._lat_sum = 0.0
+        self._lon_sum = 0.0
+        self._colors = Counter()
+
+    def add(self, name, lat, lon, point):
+        self.remove(name)
+        self.points[name] = (lat, lon, point)
+        self._lat_sum += lat
+        self._lon_sum += lon
+        self._colors[point.get('color', 'red')] += 1
+
+    def remove(self, name):
+        entry = self.points.pop(name, None)
+        if entry is not None:
+            lat, lon, point = entry
+            self._lat_sum -= lat
+            self._lon_sum -= lon
+            self._colors[point.get('color', 'red')] -= 1
+
+    @property
+    def count(self):
+        return len(self.points)
+
+    @property
+    def lat(self):
+        return self._lat_sum / len(self.points)
+
+    @property
+    def lon(self):
+        return self._lon_sum / len(self.points)
+
+    @property
+    def point(self):
+        # Ponto único do grupo (None se houver mais de um)
+        if len(self.points) != 1:
+            return None
+        return next(iter(self.points.values()))[2]
+
+    @property
+    def color(self):
+        return self._colors.most_common(1)[0][0]
+
+class MarkerClusterIndex:
+    # Grade espacial por nível de zoom: cada célula de CLUSTER_CELL_PIXELS vira um grupo.
+    # Os níveis são montados sob demanda e atualizados em add/remove.
+    def __init__(self, points=(), cell_pixels=CLUSTER_CELL_PIXELS, max_zoom=MAX_ZOOM):
+        self.cell_pixels = cell_pixels
+        self.max_zoom = max_zoom
+        self._lock = threading.Lock()
+        self._points = {}
+        self._levels = {}
+        for point in points:
+            self.add(point)
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat, lon, zoom):
+        x, y = project(lat, lon, zoom)
+        return int(x // self.cell_pixels), int(y // self.cell_pixels)
+
+    def _level(self, zoom):
+        level = self._levels.get(zoom)
+        if level is None:
+            level = {}
+            for name, (lat, lon, point) in self._points.items():
+                self._insert(level, zoom, name, lat, lon, point)
+            self._levels[zoom] = level
+        return level
+
+    def _insert(self, level, zoom, name, lat, lon, point):
+        cell = self._cell(lat, lon, zoom)
+        cluster = level.get(cell)
+        if cluster is None:
+            cluster = level[cell] = Cluster((zoom,) + cell)
+        cluster.add(name, lat, lon, point)
+
+    def _discard(self, name):
+        entry = self._points.pop(name, None)
+        if entry is None:
+            return
+        lat, lon, _ = entry
+        for zoom, level in self._levels.items():
+            cell = self._cell(lat, lon, zoom)
+            cluster = level.get(cell)
+            if cluster is not None:
+                cluster.remove(name)
+                if not cluster.points:
+                    del level[cell]
+
+    def add(self, point):
+        coordinates = point_coordinates(point)
+        with self._lock:
+            self._discard(point['name'])
+            if coordinates is None:
+                return False
+            lat, lon = coordinates
+            self._points[point['name']] = (lat, lon, point)
+            for zoom, level in self._levels.items():
+                self._insert(level, zoom, point['name'], lat, lon, point)
+            return True
+
+    def remove(self, name):
+        with self._lock:
+            self._discard(name)
+
+    def visible_clusters(self, zoom, bbox):
+        # bbox = (lat_min, lon_min, lat_max, lon_max), como em MapView.get_bbox()
+        zoom = max(0, min(int(zoom), self.max_zoom))
+        lat_min, lon_min, lat_max, lon_max = bbox
+        with self._lock:
+            level = self._level(zoom)
+            x1, y1 = self._cell(max(lat_min, lat_max), min(lon_min, lon_max), zoom)
+            x2, y2 = self._cell(min(lat_min, lat_max), max(lon_min, lon_max), zoom)
+            # Percorre as células da área visível, ou os grupos se houver menos grupos que células
+            if (x2 - x1 + 1) * (y2 - y1 + 1) <= len(level):
+                clusters = [
+                    level[(x, y)]
+                    for x in range(x1, x2 + 1)
+                    for y in range(y1, y2 + 1)
+                    if (x, y) in level
+                ]
+            else:
+                clusters = [
+                    cluster for (x, y), cluster in level.items()
+                    if x1 <= x <= x2 and y1 <= y <= y2
+                ]
+            return clusters
@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+class CrawlMetrics:
+    # Tempo por etapa e contadores, agregados no total e por ponto turístico/fonte.
+    # O ponto e a fonte atuais ficam em uma variável por thread (ver context()).
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self._start = time.perf_counter()
+            self.stages = {}
+            self.counters = {}
+            self.landmarks = {}
+
+    @contextmanager
+    def context(self, landmark=None, source=None):
+        previous = (getattr(self._local, 'landmark', None), getattr(self._local, 'source', None))
+        self._local.landmark = landmark if landmark is not None else previous[0]
+        self._local.source = source
+        try:
+            yield
+        finally:
+            self._local.landmark, self._local.source = previous
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def _targets(self):
+        # Dicionários que recebem a medição: ponto turístico e, se houver, a fonte
+        landmark = getattr(self._local, 'landmark', None)
+        if landmark is None:
+            return []
+        entry = self._landmark_entry(landmark)
+        targets = [entry]
+        source = getattr(self._local, 'source', None)
+        if source is not None:
+            targets.append(entry['sources'].setdefault(source, {'stages': {}, 'counters': {}}))
+        return targets
+
+    def _landmark_entry(self, landmark):
+        return self.landmarks.setdefault(landmark, {'stages': {}, 'counters': {}, 'sources': {}})
+
+    def _observe_stage(self, stage, seconds):
+        stats = self.stages.setdefault(stage, {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        stats['count'] += 1
+        stats['total_seconds'] += seconds
+        stats['max_seconds'] = max(stats['max_seconds'], seconds)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self._observe_stage(stage, seconds)
+            for target in self._targets():
+                target['stages'][stage] = target['stages'].get(stage, 0.0) + seconds
+
+    def observe_shared(self, stage, seconds, landmarks):
+        # Uma operação feita para vários pontos de uma vez (ex.: gravação em lote): conta uma vez
+        # no total da etapa e o tempo é dividido igualmente entre os pontos
+        landmarks = list(landmarks)
+        with self._lock:
+            self._observe_stage(stage, seconds)
+            for landmark in landmarks:
+                entry = self._landmark_entry(landmark)
+                entry['stages'][stage] = entry['stages'].get(stage, 0.0) + seconds / len(landmarks)
+
+    def increment(self, counter, value=1):
+        if not value:
+            return
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+            for target in self._targets():
+                target['counters'][counter] = target['counters'].get(counter, 0) + value
+
+    def summary(self):
+        with self._lock:
+            stages = {}
+            for stage, stats in self.stages.items():
+                stages[stage] = dict(stats, mean_seconds=stats['total_seconds'] / stats['count'])
+            return {
+                'started_at': time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started_at)),
+                'duration_seconds': time.perf_counter() - self._start,
+                'stages': stages,
+                'counters': dict(self.counters),
+                'landmarks': json.loads(json.dumps(self.landmarks))
+            }
+
+    def write_json(self, path):
+        write_atomic(path, json.dumps(self.summary(), ensure_ascii=False, indent=4))
+
+    def write_prometheus(self, path):
+        summary = self.summary()
+        lines = [
+            "# HELP crawler_run_duration_seconds Duração total da execução",
+            "# TYPE crawler_run_duration_seconds gauge",
+            f"crawler_run_duration_seconds {summary['duration_seconds']:.6f}",
+            "# HELP crawler_stage_seconds_total Tempo acumulado por etapa",
+            "# TYPE crawler_stage_seconds_total counter"
+        ]
+        for stage, stats in summary['stages'].items():
+            lines.append(f'crawler_stage_seconds_total{{stage="{stage}"}} {stats["total_seconds"]:.6f}')
+        lines += [
+            "# HELP crawler_stage_calls_total Número de execuções por etapa",
+            "# TYPE crawler_stage_calls_total counter"
+        ]
+        for stage, stats in summary['stages'].items():
+            lines.append(f'crawler_stage_calls_total{{stage="{stage}"}} {stats["count"]}')
+        lines += [
+            "# HELP crawler_stage_max_seconds Maior duração observada por etapa",
+            "# TYPE crawler_stage_max_seconds gauge"
+        ]
+        for stage, stats in summary['stages'].items():
+            lines.append(f'crawler_stage_max_seconds{{stage="{stage}"}} {stats["max_seconds"]:.6f}')
+        for counter, value in sorted(summary['counters'].items()):
+            lines += [
+                f"# TYPE crawler_{counter}_total counter",
+                f"crawler_{counter}_total {value}"
+            ]
+        write_atomic(path, '\n'.join(lines) + '\n')
+
+def write_atomic(path, content):
+    # O coletor de textfile do node_exporter pode ler o arquivo a qualquer momento
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+metrics = CrawlMetrics()
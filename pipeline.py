@@ -0,0 +1,151 @@
+import time
+import queue
+import logging
+import threading
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Itens por fila entre as etapas: quando uma etapa atrasa, as anteriores ficam
+# bloqueadas no put() em vez de acumular páginas na memória
+STAGE_QUEUE_SIZE = 8
+# Ao interromper, tempo para as threads terminarem o item em andamento
+CANCEL_TIMEOUT = 10
+
+_STOP = object()
+
+class Stage:
+    # Etapa com N threads consumindo uma fila limitada. O retorno do handler (se não for None)
+    # segue para a próxima etapa; com batch_size, o handler recebe uma lista com o que já
+    # estiver na fila (até batch_size itens).
+    def __init__(self, name, handler, workers=1, maxsize=STAGE_QUEUE_SIZE, batch_size=None):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.batch_size = batch_size
+        self.downstream = None
+        self._queue = queue.Queue(maxsize)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._running = 0
+        self._cancelled = False
+
+    def then(self, stage):
+        self.downstream = stage
+        return stage
+
+    def put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Backpressure: o tempo bloqueado aqui mostra qual etapa é o gargalo
+            start = time.perf_counter()
+            self._queue.put(item)
+            metrics.observe(f"{self.name}_queue_wait", time.perf_counter() - start)
+
+    def emit(self, output):
+        # Para handlers que produzem mais de uma saída por item
+        if self.downstream is not None and not self._cancelled:
+            self.downstream.put(output)
+
+    def start(self):
+        self._running = self.workers
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{i + 1}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+        return self
+
+    def close(self):
+        # Sem mais entradas: as threads terminam depois de esvaziar a fila
+        if not self._cancelled:
+            self._queue.put(_STOP)
+            return
+        try:
+            self._queue.put_nowait(_STOP)
+        except queue.Full:
+            # A fila está sendo descartada e já recebeu os sinais de cancel()
+            pass
+
+    def cancel(self):
+        # Descarta o que estiver na fila e o que ainda chegar; cada thread termina depois do
+        # item em andamento, sem passar o resultado adiante
+        self._cancelled = True
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in range(self.workers):
+            self.close()
+
+    def join(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+
+    def _next(self):
+        item = self._queue.get()
+        if item is _STOP or self.batch_size is None:
+            return item
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        try:
+            while True:
+                item = self._next()
+                if item is _STOP:
+                    # Devolve o sinal para as outras threads desta etapa
+                    self.close()
+                    break
+                if self._cancelled:
+                    continue
+                try:
+                    output = self.handler(item)
+                except Exception as e:
+                    logger.error(f"Erro na etapa {self.name}: {str(e)[:200]}")
+                    continue
+                if output is not None:
+                    self.emit(output)
+        finally:
+            with self._lock:
+                self._running -= 1
+                last = self._running == 0
+            if last and self.downstream is not None:
+                self.downstream.close()
+
+def run_pipeline(stages, items):
+    # Liga as etapas em sequência, alimenta a primeira e espera todas terminarem
+    for stage, next_stage in zip(stages, stages[1:]):
+        stage.then(next_stage)
+    for stage in stages:
+        stage.start()
+    try:
+        for item in items:
+            stages[0].put(item)
+        stages[0].close()
+        for stage in stages:
+            stage.join()
+    except BaseException:
+        # Interrompido (Ctrl+C/SIGTERM): ninguém mais alimenta as etapas e elas param antes
+        # de quem chamou ler os resultados ou fechar o que as etapas usam
+        cancel_pipeline(stages)
+        raise
+
+def cancel_pipeline(stages, timeout=CANCEL_TIMEOUT):
+    for stage in stages:
+        stage.cancel()
+    deadline = time.monotonic() + timeout
+    for stage in stages:
+        stage.join(max(0, deadline - time.monotonic()))
@@ -0,0 +1,269 @@
+import os
+import json
+import sqlite3
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Base única de resultados, compartilhada pelo bot (escrita) e pelo front (leitura)
+RESULTS_DB_PATH = os.path.join("results", "results.sqlite")
+RESULTS_DIR = "results"
+SUMMARY_BATCH_SIZE = 500
+# Observação da base pelo front: intervalo de consulta e espera por uma pausa nas gravações
+WATCH_INTERVAL = 1.0
+WATCH_DEBOUNCE = 2.0
+WATCH_MAX_DELAY = 10.0
+
+class ResultsStore:
+    def __init__(self, path=RESULTS_DB_PATH, shared=False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # WAL permite que o front leia enquanto o bot grava; numa pasta de rede usada por
+        # workers em várias máquinas (shared) o WAL não funciona e fica o journal comum
+        self._conn.execute("PRAGMA journal_mode=DELETE" if shared else "PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                name TEXT PRIMARY KEY,
+                -- Colunas de resumo, gravadas junto com o relatório completo (data)
+                classification TEXT,
+                color TEXT,
+                score INTEGER,
+                categories TEXT,
+                latitude REAL,
+                longitude REAL,
+                timestamp TEXT,
+                data TEXT NOT NULL,
+                -- Número da gravação que criou/alterou o registro (ver changes_since)
+                revision INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(results)")]
+        if 'revision' not in columns:
+            self._conn.execute("ALTER TABLE results ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+        if 'categories' not in columns:
+            # Pontuação por categoria fora do JSON completo, para os filtros das consultas por proximidade
+            self._conn.execute("ALTER TABLE results ADD COLUMN categories TEXT")
+            self._conn.execute("UPDATE results SET categories = json_extract(data, '$.report.categories')")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_revision ON results (revision)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+    def _row(self, data):
+        coordinates = data.get('coordinates') or {}
+        return (
+            data['name'],
+            data.get('classification'),
+            data.get('color'),
+            data.get('report', {}).get('score'),
+            json.dumps(data.get('report', {}).get('categories') or {}),
+            coordinates.get('latitude'),
+            coordinates.get('longitude'),
+            data.get('timestamp'),
+            json.dumps(data, ensure_ascii=False)
+        )
+
+    def save(self, data):
+        self.save_many([data])
+
+    def _next_revision(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        revision = int(row[0]) + 1 if row else 1
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('revision', ?)", (str(revision),))
+        return revision
+
+    def save_many(self, records):
+        # Uma transação por lote: ou todos os registros entram ou nenhum
+        rows = [self._row(data) for data in records]
+        with self._lock, self._conn:
+            revision = self._next_revision()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results "
+                "(name, classification, color, score, categories, latitude, longitude, timestamp, data, revision) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [row + (revision,) for row in rows]
+            )
+
+    def get(self, name):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM results WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, name):
+        with self._lock, self._conn:
+            self._next_revision()
+            self._conn.execute("DELETE FROM results WHERE name = ?", (name,))
+
+    def revision(self):
+        return int(self.get_meta('revision') or 0)
+
+    def data_version(self):
+        # Muda quando outra conexão (ex.: o bot) grava na base; consulta barata
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def names(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM results ORDER BY name")]
+
+    def load_all(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM results ORDER BY name").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def load_summaries(self):
+        return [summary for batch in self.iter_summaries() for summary in batch]
+
+    def _summaries(self, rows):
+        return [
+            {
+                'name': name,
+                'classification': classification,
+                'color': color,
+                'score': score,
+                'categories': json.loads(categories) if categories else {},
+                'coordinates': {'latitude': latitude, 'longitude': longitude}
+            }
+            for name, classification, color, score, categories, latitude, longitude in rows
+        ]
+
+    def iter_summaries(self, batch_size=SUMMARY_BATCH_SIZE):
+        # Só as colunas usadas na tela principal, sem decodificar o relatório completo.
+        # Lotes paginados pelo nome: o lock não fica preso entre um lote e outro.
+        last_name = ''
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT name, classification, color, score, categories, latitude, longitude FROM results "
+                    "WHERE name > ? ORDER BY name LIMIT ?",
+                    (last_name, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield self._summaries(rows)
+            last_name = rows[-1][0]
+
+    def changes_since(self, revision):
+        # Resumos gravados depois da revisão dada e a revisão atual
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, classification, color, score, categories, latitude, longitude FROM results "
+                "WHERE revision > ? ORDER BY name",
+                (revision,)
+            ).fetchall()
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return self._summaries(rows), int(row[0]) if row else 0
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def get_meta(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def migrate_from_directory(self, directory=RESULTS_DIR):
+        # Migração única dos arquivos <nome>_accessibility.json para a base
+        if self.get_meta('migrated_from') is not None:
+            return 0
+        if not os.path.isdir(directory):
+            self.set_meta('migrated_from', directory)
+            return 0
+
+        records = {}
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith('_accessibility.json'):
+                continue
+            filepath = os.path.join(directory, filename)
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                logger.error(f"Erro ao migrar {filename}: {e}")
+                continue
+            # Arquivos duplicados do mesmo local (ex.: "..._ _accessibility.json"): fica o mais recente
+            current = records.get(data['name'])
+            if current is None or (data.get('timestamp') or '') > (current.get('timestamp') or ''):
+                records[data['name']] = data
+
+        existing = set(self.names())
+        self.save_many([data for name, data in records.items() if name not in existing])
+        self.set_meta('migrated_from', directory)
+        logger.info(f"{len(records)} resultados migrados de {directory} para {self.path}")
+        return len(records)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class ResultsWatcher:
+    # Observa a base em uma thread e entrega as mudanças agrupadas: espera WATCH_DEBOUNCE
+    # sem novas gravações (ou no máximo WATCH_MAX_DELAY) antes de chamar on_change(updated, removed)
+    def __init__(self, store, names, revision, on_change, interval=WATCH_INTERVAL,
+                 debounce=WATCH_DEBOUNCE, max_delay=WATCH_MAX_DELAY):
+        self.store = store
+        self.names = set(names)
+        self.revision = revision
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="observador", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        version = self.store.data_version()
+        first_change = last_change = None
+        # Mudanças gravadas antes de o observador começar (ex.: durante o carregamento)
+        if self.store.revision() != self.revision:
+            first_change = last_change = time.monotonic()
+        while not self._stop.wait(self.interval):
+            try:
+                current = self.store.data_version()
+                now = time.monotonic()
+                if current != version:
+                    version = current
+                    last_change = now
+                    first_change = first_change or now
+                if first_change and (now - last_change >= self.debounce or now - first_change >= self.max_delay):
+                    self.check()
+                    first_change = last_change = None
+            except Exception as e:
+                logger.error(f"Erro ao observar a base de resultados: {e}")
+                if first_change:
+                    # As mesmas mudanças são entregues de novo depois do debounce
+                    first_change = last_change = time.monotonic()
+
+    def check(self):
+        updated, revision = self.store.changes_since(self.revision)
+        if revision == self.revision:
+            return
+        names = self.names | {point['name'] for point in updated}
+        removed = []
+        # Remoções não deixam registro: só compara os nomes quando a contagem não bate
+        if self.store.count() != len(names):
+            current = set(self.store.names())
+            removed = sorted(names - current)
+            names = current
+        if updated or removed:
+            logger.info(f"Base de resultados alterada: {len(updated)} atualizados, {len(removed)} removidos")
+            self.on_change(updated, removed)
+        # Só avança depois de on_change: se ele falhar, nada se perde
+        self.revision = revision
+        self.names = names
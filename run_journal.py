@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Diário da execução: fontes e pontos concluídos, para retomar com --resume
+JOURNAL_PATH = os.path.join("cache", "run_journal.sqlite")
+
+class RunJournal:
+    def __init__(self, path=JOURNAL_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.run_id = None
+        self._done = set()
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                landmarks_file TEXT,
+                total INTEGER,
+                status TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_sources (
+                run_id INTEGER NOT NULL,
+                landmark TEXT NOT NULL,
+                source TEXT NOT NULL,
+                items TEXT NOT NULL,
+                changed INTEGER NOT NULL,
+                content_hash TEXT,
+                finished_at REAL NOT NULL,
+                PRIMARY KEY (run_id, landmark, source)
+            )
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(run_sources)")]
+        if 'content_hash' not in columns:
+            self._conn.execute("ALTER TABLE run_sources ADD COLUMN content_hash TEXT")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_landmarks (
+                run_id INTEGER NOT NULL,
+                landmark TEXT NOT NULL,
+                finished_at REAL NOT NULL,
+                PRIMARY KEY (run_id, landmark)
+            )
+        """)
+        self._conn.commit()
+
+    def start(self, landmarks_file, total):
+        with self._lock, self._conn:
+            # Só a última execução fica com o detalhe das fontes e pontos
+            self._conn.execute("DELETE FROM run_sources")
+            self._conn.execute("DELETE FROM run_landmarks")
+            self._conn.execute("UPDATE runs SET status = 'abandoned' WHERE status != 'completed'")
+            cursor = self._conn.execute(
+                "INSERT INTO runs (landmarks_file, total, status, started_at) VALUES (?, ?, 'running', ?)",
+                (landmarks_file, total, time.time())
+            )
+            self.run_id = cursor.lastrowid
+            self._done = set()
+            self._sources = {}
+        logger.info(f"Execução {self.run_id} iniciada ({total} pontos)")
+        return self.run_id
+
+    def resume(self, landmarks_file, total):
+        # Retoma a última execução se ela não terminou; se foi concluída ou abandonada (start() já
+        # apagou o detalhe dela), começa outra
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, landmarks_file, status FROM runs ORDER BY run_id DESC LIMIT 1"
+            ).fetchone()
+        if row is None or row[2] not in ('running', 'interrupted'):
+            logger.info("Nenhuma execução interrompida para retomar.")
+            return self.start(landmarks_file, total)
+
+        run_id, previous_file, _ = row
+        if previous_file != landmarks_file:
+            logger.warning(f"A execução {run_id} usava {previous_file}; retomando com {landmarks_file}")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET status = 'running', total = ?, finished_at = NULL WHERE run_id = ?",
+                (total, run_id)
+            )
+            self._done = {
+                name for (name,) in self._conn.execute(
+                    "SELECT landmark FROM run_landmarks WHERE run_id = ?", (run_id,)
+                )
+            }
+            self._sources = {
+                (landmark, source): (json.loads(items), bool(changed), content_hash)
+                for landmark, source, items, changed, content_hash in self._conn.execute(
+                    "SELECT landmark, source, items, changed, content_hash FROM run_sources WHERE run_id = ?",
+                    (run_id,)
+                )
+            }
+            self.run_id = run_id
+        logger.info(f"Retomando a execução {run_id}: {len(self._done)} pontos e {len(self._sources)} fontes já concluídos")
+        return run_id
+
+    def is_done(self, landmark):
+        return landmark in self._done
+
+    def source_result(self, landmark, source):
+        # (itens, mudou, hash do conteúdo) de uma fonte já processada nesta execução, ou None
+        return self._sources.get((landmark, source))
+
+    def record_source(self, landmark, source, items, changed, content_hash=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO run_sources (run_id, landmark, source, items, changed, content_hash, finished_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.run_id, landmark, source, json.dumps(items, ensure_ascii=False), int(changed), content_hash,
+                 time.time())
+            )
+
+    def record_landmarks(self, landmarks):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO run_landmarks (run_id, landmark, finished_at) VALUES (?, ?, ?)",
+                [(self.run_id, landmark, now) for landmark in landmarks]
+            )
+            self._done.update(landmarks)
+
+    def finish(self, status='completed'):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, finished_at = ? WHERE run_id = ?",
+                (status, time.time(), self.run_id)
+            )
+        logger.info(f"Execução {self.run_id}: {status} ({len(self._done)} pontos concluídos)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,107 @@
+import re
+import bisect
+import threading
+import unicodedata
+from collections import defaultdict
+
+# Fração mínima dos trigramas do termo buscado que o nome precisa conter (busca aproximada)
+FUZZY_THRESHOLD = 0.5
+MIN_FUZZY_LENGTH = 3
+EXACT_TOKEN_SCORE = 1.0
+PREFIX_TOKEN_SCORE = 0.9
+FUZZY_TOKEN_SCORE = 0.7
+
+def normalize_text(text):
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    return ' '.join(re.findall(r'\w+', text))
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchIndex:
+    # Índice de nomes sem acentos: prefixo por palavra (lista ordenada + bisect)
+    # e trigramas para tolerar erros de digitação
+    def __init__(self, names=()):
+        self._lock = threading.Lock()
+        self.names = []
+        self._ids = {}
+        self._removed = set()
+        self._tokens = []
+        self._trigrams = defaultdict(set)
+        self.add_many(names)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _index_name(self, name):
+        entry_id = len(self.names)
+        self.names.append(name)
+        self._ids[name] = entry_id
+        tokens = normalize_text(name).split()
+        for token in tokens:
+            for gram in trigrams(token):
+                self._trigrams[gram].add(entry_id)
+        return [(token, entry_id) for token in tokens]
+
+    def add_many(self, names):
+        with self._lock:
+            new_tokens = []
+            for name in names:
+                if name and name not in self._ids:
+                    new_tokens.extend(self._index_name(name))
+            self._tokens.extend(new_tokens)
+            self._tokens.sort()
+
+    def add(self, name):
+        with self._lock:
+            if not name or name in self._ids:
+                return
+            for item in self._index_name(name):
+                bisect.insort(self._tokens, item)
+
+    def remove(self, name):
+        with self._lock:
+            entry_id = self._ids.pop(name, None)
+            if entry_id is not None:
+                self._removed.add(entry_id)
+
+    def search(self, query, limit=10):
+        query_tokens = normalize_text(query).split()
+        if not query_tokens:
+            return []
+
+        with self._lock:
+            scores = defaultdict(float)
+            for token in query_tokens:
+                token_scores = {}
+
+                index = bisect.bisect_left(self._tokens, (token,))
+                while index < len(self._tokens) and self._tokens[index][0].startswith(token):
+                    word, entry_id = self._tokens[index]
+                    score = EXACT_TOKEN_SCORE if word == token else PREFIX_TOKEN_SCORE
+                    token_scores[entry_id] = max(token_scores.get(entry_id, 0.0), score)
+                    index += 1
+
+                # Busca aproximada só quando os prefixos não bastam
+                if len(token_scores) < limit and len(token) >= MIN_FUZZY_LENGTH:
+                    grams = trigrams(token)
+                    counts = defaultdict(int)
+                    for gram in grams:
+                        for entry_id in self._trigrams.get(gram, ()):
+                            counts[entry_id] += 1
+                    for entry_id, count in counts.items():
+                        similarity = count / len(grams)
+                        if similarity >= FUZZY_THRESHOLD:
+                            score = FUZZY_TOKEN_SCORE * similarity
+                            token_scores[entry_id] = max(token_scores.get(entry_id, 0.0), score)
+
+                for entry_id, score in token_scores.items():
+                    scores[entry_id] += score
+
+            ranked = sorted(
+                (entry_id for entry_id in scores if entry_id not in self._removed),
+                key=lambda entry_id: (-scores[entry_id], len(self.names[entry_id]), self.names[entry_id])
+            )
+            return [self.names[entry_id] for entry_id in ranked[:limit]]
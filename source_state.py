@@ -0,0 +1,68 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Estado das fontes para execuções incrementais
+STATE_PATH = os.path.join("cache", "sources.sqlite")
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class SourceStateStore:
+    def __init__(self, path=STATE_PATH, ignore_existing=False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Com ignore_existing o estado anterior é ignorado, mas continua sendo regravado
+        self.ignore_existing = ignore_existing
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                items TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, source):
+        if self.ignore_existing:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, content_hash, items FROM sources WHERE source = ?",
+                (source,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        etag, last_modified, stored_hash, items = row
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_hash': stored_hash,
+            'items': json.loads(items)
+        }
+
+    def set(self, source, etag, last_modified, stored_hash, items):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (source, etag, last_modified, content_hash, items, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (source, etag, last_modified, stored_hash, json.dumps(items, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
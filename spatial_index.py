@@ -0,0 +1,258 @@
+import sys
+import math
+import heapq
+import logging
+import argparse
+import threading
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+# Pontos por folha da KD-tree
+LEAF_SIZE = 16
+# Inclusões/remoções pendentes (fora da árvore) antes de reconstruí-la
+REBUILD_MIN_PENDING = 256
+REBUILD_FRACTION = 0.1
+NEARBY_RADIUS_KM = 2.0
+NEARBY_LIMIT = 10
+
+def to_unit_vector(lat, lon):
+    # Coordenadas no espaço 3D (esfera unitária): a distância em linha reta cresce junto
+    # com a distância sobre a superfície, o que vale de uma cidade ao país inteiro
+    lat = math.radians(lat)
+    lon = math.radians(lon)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat))
+
+def chord_for_km(km):
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+def km_for_chord_squared(chord_squared):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+def matches(point, classifications=None, min_score=None, min_categories=None):
+    if classifications and point.get('classification') not in classifications:
+        return False
+    if min_score is not None and (point.get('score') or 0) < min_score:
+        return False
+    if min_categories:
+        categories = point.get('categories') or {}
+        for category, minimum in min_categories.items():
+            if (categories.get(category) or 0) < minimum:
+                return False
+    return True
+
+class SpatialIndex:
+    # KD-tree estática + lista de pendentes: add/remove não reconstroem a árvore a cada chamada
+    def __init__(self, points=()):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._pending = {}
+        self._removed = set()
+        self._tree = None
+        self._vectors = []
+        self._points = []
+        for point in points:
+            entry = self._entry(point)
+            if entry is not None:
+                self._entries[point['name']] = entry
+        self._rebuild()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _entry(self, point):
+        coordinates = point.get('coordinates') or {}
+        lat = coordinates.get('latitude')
+        lon = coordinates.get('longitude')
+        if lat is None or lon is None:
+            return None
+        return to_unit_vector(lat, lon), point
+
+    def _rebuild(self):
+        entries = list(self._entries.values())
+        self._vectors = [vector for vector, _ in entries]
+        self._points = [point for _, point in entries]
+        self._pending = {}
+        self._removed = set()
+        self._tree = self._build(list(range(len(entries)))) if entries else None
+
+    def _build(self, ids):
+        if len(ids) <= LEAF_SIZE:
+            return (None, None, ids, None)
+        # Divide pelo eixo de maior amplitude, na mediana
+        vectors = self._vectors
+        spreads = [
+            max(vectors[i][axis] for i in ids) - min(vectors[i][axis] for i in ids)
+            for axis in range(3)
+        ]
+        axis = spreads.index(max(spreads))
+        ids.sort(key=lambda i: vectors[i][axis])
+        middle = len(ids) // 2
+        split = vectors[ids[middle]][axis]
+        return (axis, split, self._build(ids[:middle]), self._build(ids[middle:]))
+
+    def add(self, point):
+        with self._lock:
+            self._discard(point['name'])
+            entry = self._entry(point)
+            if entry is None:
+                return False
+            self._entries[point['name']] = entry
+            self._pending[point['name']] = entry
+            self._maybe_rebuild()
+            return True
+
+    def remove(self, name):
+        with self._lock:
+            self._discard(name)
+            self._maybe_rebuild()
+
+    def _discard(self, name):
+        if self._entries.pop(name, None) is not None:
+            if self._pending.pop(name, None) is None:
+                self._removed.add(name)
+
+    def _maybe_rebuild(self):
+        changes = len(self._pending) + len(self._removed)
+        if changes > max(REBUILD_MIN_PENDING, len(self._entries) * REBUILD_FRACTION):
+            self._rebuild()
+
+    def _candidates(self, query, limit_squared):
+        # (distância², ponto) dentro do raio, incluindo os pendentes.
+        # Nomes em _removed têm na árvore uma versão antiga (removida ou substituída por um pendente).
+        stack = [self._tree] if self._tree else []
+        vectors = self._vectors
+        while stack:
+            axis, split, left, right = stack.pop()
+            if axis is None:
+                for i in left:
+                    if self._points[i]['name'] in self._removed:
+                        continue
+                    vector = vectors[i]
+                    distance = ((vector[0] - query[0]) ** 2 + (vector[1] - query[1]) ** 2
+                                + (vector[2] - query[2]) ** 2)
+                    if distance <= limit_squared:
+                        yield distance, self._points[i]
+                continue
+            diff = query[axis] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            if diff * diff <= limit_squared:
+                stack.append(far)
+            stack.append(near)
+        for vector, point in self._pending.values():
+            distance = sum((vector[axis] - query[axis]) ** 2 for axis in range(3))
+            if distance <= limit_squared:
+                yield distance, point
+
+    def within(self, lat, lon, radius_km, classifications=None, min_score=None, min_categories=None, limit=None):
+        # Pontos a até radius_km, do mais próximo ao mais distante: [(distância_km, ponto)]
+        query = to_unit_vector(lat, lon)
+        limit_squared = chord_for_km(radius_km) ** 2
+        with self._lock:
+            found = [
+                (distance, point) for distance, point in self._candidates(query, limit_squared)
+                if matches(point, classifications, min_score, min_categories)
+            ]
+        found.sort(key=lambda item: (item[0], item[1]['name']))
+        if limit is not None:
+            found = found[:limit]
+        return [(km_for_chord_squared(distance), point) for distance, point in found]
+
+    def nearest(self, lat, lon, k=NEARBY_LIMIT, classifications=None, min_score=None, min_categories=None,
+                max_km=None):
+        # k pontos mais próximos que passam nos filtros: busca na árvore podando pelo k-ésimo melhor
+        query = to_unit_vector(lat, lon)
+        worst = chord_for_km(max_km) ** 2 if max_km is not None else float('inf')
+        best = []
+        with self._lock:
+            def consider(distance, point):
+                nonlocal worst
+                if distance > worst:
+                    return
+                if not matches(point, classifications, min_score, min_categories):
+                    return
+                item = (-distance, point['name'], point)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                else:
+                    heapq.heappushpop(best, item)
+                if len(best) == k:
+                    worst = min(worst, -best[0][0])
+
+            for vector, point in self._pending.values():
+                consider(sum((vector[axis] - query[axis]) ** 2 for axis in range(3)), point)
+
+            stack = [(self._tree, 0.0)] if self._tree else []
+            vectors = self._vectors
+            while stack:
+                node, bound = stack.pop()
+                if bound > worst:
+                    continue
+                axis, split, left, right = node
+                if axis is None:
+                    for i in left:
+                        if self._points[i]['name'] in self._removed:
+                            continue
+                        vector = vectors[i]
+                        consider((vector[0] - query[0]) ** 2 + (vector[1] - query[1]) ** 2
+                                 + (vector[2] - query[2]) ** 2, self._points[i])
+                    continue
+                diff = query[axis] - split
+                near, far = (left, right) if diff < 0 else (right, left)
+                stack.append((far, max(bound, diff * diff)))
+                stack.append((near, bound))
+
+        best.sort(key=lambda item: (-item[0], item[1]))
+        return [(km_for_chord_squared(-distance), point) for distance, _, point in best]
+
+def parse_min_categories(values):
+    min_categories = {}
+    for value in values or []:
+        category, _, minimum = value.partition('=')
+        min_categories[category.strip()] = float(minimum)
+    return min_categories
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pontos turísticos próximos de uma coordenada")
+    parser.add_argument("lat", type=float)
+    parser.add_argument("lon", type=float)
+    parser.add_argument("--radius", type=float, help=f"Raio em km (padrão: {NEARBY_RADIUS_KM}; sem limite com --k)")
+    parser.add_argument("--k", type=int, help="Retorna os k mais próximos")
+    parser.add_argument("--classification", action="append",
+                        help="Classificação aceita (pode repetir), ex.: --classification Acessível")
+    parser.add_argument("--min-score", type=float)
+    parser.add_argument("--min-category", action="append", metavar="CATEGORIA=MIN",
+                        help="Pontuação mínima por categoria, ex.: --min-category mobilidade=5")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    from results_store import ResultsStore
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args(argv)
+    store = ResultsStore()
+    try:
+        store.migrate_from_directory()
+        index = SpatialIndex(store.load_summaries())
+    finally:
+        store.close()
+
+    filters = {
+        'classifications': set(args.classification) if args.classification else None,
+        'min_score': args.min_score,
+        'min_categories': parse_min_categories(args.min_category)
+    }
+    if args.k:
+        found = index.nearest(args.lat, args.lon, args.k, max_km=args.radius, **filters)
+    else:
+        found = index.within(args.lat, args.lon, args.radius or NEARBY_RADIUS_KM, **filters)
+
+    for distance, point in found:
+        print(f"{distance:8.2f} km  {point['name']} ({point['classification']}, score {point['score']})")
+    if not found:
+        print("Nenhum ponto encontrado.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos do projeto ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Estado global do bot que os testes alteram (base de resultados, sessão HTTP e geocodificação)
+BOT_GLOBALS = (
+    '_results_store', '_results_store_path', '_results_store_shared', '_http_session',
+    '_geolocator', '_geocode_cache', '_gazetteer', '_gazetteer_path', '_gazetteer_loaded', 'remote_geocoding'
+)
+
+@pytest.fixture(autouse=True)
+def restore_bot_globals():
+    import bot
+    from metrics import metrics
+
+    saved = {name: getattr(bot, name) for name in BOT_GLOBALS}
+    yield
+    store = bot._results_store
+    if store is not None and store is not saved['_results_store']:
+        store.close()
+    for name, value in saved.items():
+        setattr(bot, name, value)
+    metrics.reset()
@@ -0,0 +1,189 @@
+import re
+import html
+
+# Cópia congelada de extract_relevant_content() antes da busca em uma passada (texto
+# normalizado e padrão combinado), usada como referência em test_extraction.py.
+# Não atualizar junto com bot.py.
+CONTEXT_WINDOW = 200
+MAX_RELEVANT_SNIPPETS = 15
+
+ACCESSIBILITY_FEATURES = {
+    'rampas': {
+        'pattern': re.compile(
+            r'\b(rampa[s]?|acesso[s]? (sem degrau[s]?|nivelado[s]?|por rampa|para mobilidade reduzida|com corrimão|PCD)|inclina[çc][ãa]o acess[íi]vel)\b',
+            re.IGNORECASE
+        ),
+        'weight': 2,
+        'category': 'mobilidade'
+    },
+    'elevadores': {
+        'pattern': re.compile(
+            r'\b(elevador[es]?|elevador[es]? (acess[íi]ve[lis]?|adaptado[s]?|para cadeirante[s]?|com braille|com voz|PCD|de acesso|com porta larga)|acesso por elevador)\b',
+            re.IGNORECASE
+        ),
+        'weight': 3,
+        'category': 'mobilidade'
+    },
+    'banheiros_adaptados': {
+        'pattern': re.compile(
+            r'\b(banheiro[s]?|sanit[áa]rio[s]?|lavabo[s]?)( (adaptado[s]?|acess[íi]ve[lis]?|para cadeirante[s]?|com barras|PCD))?\b',
+            re.IGNORECASE
+        ),
+        'weight': 3,
+        'category': 'mobilidade'
+    },
+    'plataformas_elevatorias': {
+        'pattern': re.compile(
+            r'\b(plataforma[s]?|plataforma[s]? (elevat[óo]ria[s]?|de acesso|acess[íi]ve[lis]?|para cadeirante[s]?|PCD)|elevador[es]? de plataforma)\b',
+            re.IGNORECASE
+        ),
+        'weight': 3,
+        'category': 'mobilidade'
+    },
+    'pisos_tateis': {
+        'pattern': re.compile(
+            r'\b(piso[s]? t[áa]te[lis]?|piso[s]? podot[áa]te[lis]?|sinaliza[çc][ãa]o t[áa]til no piso|caminho[s]? t[áa]til)\b',
+            re.IGNORECASE
+        ),
+        'weight': 2,
+        'category': 'visual'
+    },
+    'braille': {
+        'pattern': re.compile(
+            r'\b(braille|braile|sinaliza[çc][ãa]o em braille|placa[s]? em braille|informa[çc][õo]es em braille|legenda[s]? em braille)\b',
+            re.IGNORECASE
+        ),
+        'weight': 2,
+        'category': 'visual'
+    },
+    'painel_tatil': {
+        'pattern': re.compile(
+            r'\b(pain[eé]is? t[áa]te[lis]?|maquete[s]? t[áa]til|placa[s]? t[áa]til|mapa[s]? t[áa]til)\b',
+            re.IGNORECASE
+        ),
+        'weight': 2,
+        'category': 'visual'
+    },
+    'recursos_auditivos': {
+        'pattern': re.compile(
+            r'\b(sinaliza[çc][ãa]o sonora|audioguia[s]?|[áa]udio descritivo|sistema de [áa]udio acess[íi]vel|loop auditivo)\b',
+            re.IGNORECASE
+        ),
+        'weight': 2,
+        'category': 'auditiva'
+    },
+    'legendas': {
+        'pattern': re.compile(
+            r'\b(legenda[s]? (para surdo[s]?|descritiva[s]?|em tempo real|acess[íi]ve[lis]?|em v[íi]deo)|closed caption[s]?|subt[íi]tulo[s]? acess[íi]ve[lis]?)\b',
+            re.IGNORECASE
+        ),
+        'weight': 2,
+        'category': 'auditiva'
+    },
+    'libras': {
+        'pattern': re.compile(
+            r'\b((informa[çc][õo]es|v[íi]deo[s]?|atendimento|sinaliza[çc][ãa]o|tradu[çc][ãa]o) em libras|int[ée]rprete[s]? de libras)\b',
+            re.IGNORECASE
+        ),
+        'weight': 3,
+        'category': 'auditiva'
+    },
+    'vagas_especiais': {
+        'pattern': re.compile(
+            r'\b(vaga[s]? (especial[es]?|para deficiente[s]?|priorit[áa]ria[s]?|PCD)|estacionamento acess[íi]vel)\b',
+            re.IGNORECASE
+        ),
+        'weight': 1,
+        'category': 'geral'
+    },
+    'acesso_universal': {
+        'pattern': re.compile(
+            r'\b(acesso universal|acessibilidade (total|inclusiva)|desenho universal|ambiente sem barreira[s]?)\b',
+            re.IGNORECASE
+        ),
+        'weight': 3,
+        'category': 'geral'
+    },
+    'acessibilidade_digital': {
+        'pattern': re.compile(
+            r'\b(acessibilidade digital|site acess[íi]vel|compatibilidade com leitor de tela|WCAG [0-9.]+|contraste elevado)\b',
+            re.IGNORECASE
+        ),
+        'weight': 2,
+        'category': 'digital'
+    },
+    'recursos_cognitivos': {
+        'pattern': re.compile(
+            r'\b(sinaliza[çc][ãa]o simplificada|instru[çc][õo]es claras|guia[s]? simplificado[s]?|pictogramas acess[íi]veis|linguagem simples)\b',
+            re.IGNORECASE
+        ),
+        'weight': 2,
+        'category': 'cognitiva'
+    },
+    'assentos_acessiveis': {
+        'pattern': re.compile(
+            r'\b(assento[s]? (acess[íi]ve[lis]?|reservado[s]?|priorit[áa]rio[s]?|para cadeirante[s]?|PCD)|espa[çc]o para cadeirante[s]?)\b',
+            re.IGNORECASE
+        ),
+        'weight': 2,
+        'category': 'geral'
+    }
+}
+
+# Palavras-chave de contexto
+CONTEXT_KEYWORDS = [
+    'acess', 'deficiente', 'cadeirante', 'visual', 'auditi', 'surdo', 'PCD', 'inclus',
+    'mobilidade', 'tátil', 'braille', 'libras', 'adaptado', 'acessibilidade', 'universal',
+    'facilidade', 'deficiência', 'barreira', 'inclusão', 'acesso', 'especial'
+]
+
+def extract_relevant_content(text, source):
+    relevant_items = []
+    text = text.lower()
+    matched_terms = {}
+
+    for feature, data in ACCESSIBILITY_FEATURES.items():
+        matched_terms[feature] = set()
+        pattern = data['pattern']
+        weight = data['weight']
+        category = data['category']
+        matches = pattern.finditer(text)
+        
+        for match in matches:
+            term = match.group(0).lower()
+            start = max(0, match.start() - CONTEXT_WINDOW)
+            end = min(len(text), match.end() + CONTEXT_WINDOW)
+            snippet = text[start:end].strip()
+            
+            # Validação de contexto
+            has_context = any(keyword.lower() in snippet for keyword in CONTEXT_KEYWORDS)
+            if not has_context:
+                implicit_context = (
+                    feature in ['elevadores', 'banheiros_adaptados', 'rampas', 'plataformas_elevatorias'] and
+                    any(word in snippet for word in ['acesso', 'disponível', 'instalado', 'equipado'])
+                )
+                if not implicit_context:
+                    continue
+            
+            # Normalização para deduplicação
+            normalized_term = re.sub(r'\s+', ' ', term).strip()
+            normalized_term = re.sub(r's\b', '', normalized_term).strip()
+            
+            # Permite variações distintas
+            term_key = f"{feature}:{normalized_term}"
+            if term_key not in matched_terms[feature]:
+                matched_terms[feature].add(term_key)
+                snippet = html.unescape(snippet)
+                snippet = ' '.join(snippet.split())
+                
+                relevant_items.append({
+                    'feature': feature,
+                    'term': term,
+                    'snippet': snippet,
+                    'weight': weight,
+                    'category': category,
+                    'source': source
+                })
+    
+    relevant_items.sort(key=lambda x: -x['weight'])
+    return relevant_items[:MAX_RELEVANT_SNIPPETS]
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+import bot
+import legacy_extraction
+
+# Vocabulário das páginas aleatórias: termos dos recursos, palavras de contexto e texto comum
+WORDS = [
+    'rampa', 'rampas', 'acesso sem degrau', 'acessos nivelados', 'com corrimão', 'elevador', 'elevadores adaptados',
+    'banheiro adaptado', 'sanitário', 'lavabos acessíveis', 'vaga especial', 'vagas prioritárias', 'piso tátil',
+    'pisos podotáteis', 'braille', 'sinalização em braille', 'painéis táteis', 'libras', 'intérprete de libras',
+    'informações em libras', 'áudio descritivo', 'audioguias', 'legenda em vídeo', 'subtítulo acessível',
+    'acessibilidade', 'acessibilidade total', 'desenho universal', 'wcag 2.1', 'linguagem simples',
+    'assento reservado', 'espaço para cadeirantes', 'plataforma elevatória', 'inclinação acessível',
+    'cadeirante', 'deficiência', 'mobilidade reduzida', 'pcd', 'disponível', 'instalado', 'acesso',
+    'museu', 'horário', 'entrada', 'estacionamento', 'ingressos', 'cafeteria',
+    # Grafias sem acento ou com acento trocado, que os padrões originais não aceitam
+    'com corrimao', 'inclinacao acessivel', 'sanitario', 'paineis tateis', 'vaga especialé', 'rampá', 'audio descritivo'
+]
+# Caracteres que mudam ao normalizar: marcas soltas, 'İ' (vira 'i' + ponto), letras que o
+# re.IGNORECASE antigo igualava ('ı', 'ſ') e compatibilidade que não deve virar ASCII ('ﬁ', 'ａ')
+ODD = ['İ', '\u0301', '\u0307', 'ß', 'ſ', 'ı', 'ﬁ', 'ａ', '²', 'ǅ', '&amp;', '.', '-', '\t']
+SEPARATORS = ['', ' ', ' ', '\n', ', ', '. ']
+
+def random_page(rng):
+    parts = []
+    for _ in range(rng.randint(1, 10)):
+        if rng.random() < 0.75:
+            parts.append(rng.choice(WORDS))
+        else:
+            parts.append(''.join(rng.choice(ODD) for _ in range(rng.randint(1, 2))))
+        parts.append(rng.choice(SEPARATORS))
+    page = ''.join(parts)
+    return page.upper() if rng.random() < 0.2 else page
+
+def test_matches_legacy_on_random_pages():
+    rng = random.Random(6)
+    for _ in range(3000):
+        page = random_page(rng)
+        assert bot.extract_relevant_content(page, 's') == legacy_extraction.extract_relevant_content(page, 's'), page
+
+@pytest.mark.parametrize('page', [
+    'İacesso sem degrau',
+    'banheiro adaptadoİbanheiro adaptado',
+    'elevadoṙ acessível',
+    'acessópcd',
+    'rampaſ de acesso',
+    'ınterprete de libras',
+    'ﬁ rampa ａ acessibilidade',
+    'Pisos Podotáteis e ELEVADOR DE PLATAFORMA',
+])
+def test_matches_legacy_on_word_boundaries(page):
+    assert bot.extract_relevant_content(page, 's') == legacy_extraction.extract_relevant_content(page, 's')
+
+@pytest.mark.parametrize('page', [
+    'acesso com corrimao',
+    'vaga especialé para cadeirantes',
+    'rampá de acesso',
+])
+def test_accent_variants_do_not_match(page):
+    # O texto sem acentos só indica onde procurar: o termo precisa casar com o padrão original
+    assert not legacy_extraction.extract_relevant_content(page, 's')
+    assert not bot.extract_relevant_content(page, 's')
+
+def test_streaming_matches_legacy():
+    rng = random.Random(7)
+    pages = []
+    size = 0
+    while size <= bot.STREAMING_THRESHOLD:
+        pages.append(random_page(rng) + ' museu de brasília ' * 40)
+        size += len(pages[-1]) + 1
+    text = '\n'.join(pages)
+    assert bot.extract_relevant_content(text, 's') == legacy_extraction.extract_relevant_content(text, 's')
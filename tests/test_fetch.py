@@ -0,0 +1,67 @@
+import io
+
+import pytest
+import requests
+
+import bot
+
+class FakeSession:
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        if self.error:
+            raise self.error
+        return self.response
+
+def html_response(body, content_type):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = content_type
+    response.raw = io.BytesIO(body)
+    # Como o HTTPAdapter: text/* sem charset fica como ISO-8859-1
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+def test_meta_charset_without_header_charset(monkeypatch):
+    # Sem charset no Content-Type, o requests decodificaria como ISO-8859-1
+    body = '<html><head><meta charset="utf-8"></head><body>Elevador acessível e área de circulação</body></html>'
+    monkeypatch.setattr(bot, 'get_http_session', lambda: FakeSession(html_response(body.encode('utf-8'), 'text/html')))
+    page = bot.fetch_http("https://museu.example/")
+    assert page['text'] == 'Elevador acessível e área de circulação'
+
+def test_header_charset_wins(monkeypatch):
+    body = '<html><body>Audiodescrição</body></html>'.encode('iso-8859-1')
+    response = html_response(body, 'text/html; charset=ISO-8859-1')
+    monkeypatch.setattr(bot, 'get_http_session', lambda: FakeSession(response))
+    assert bot.fetch_http("https://museu.example/")['text'] == 'Audiodescrição'
+
+def test_http_mode_failure_raises(monkeypatch):
+    # Uma falha não pode virar página vazia: ela substituiria o estado salvo e entraria no diário
+    error = requests.ConnectionError("conexão recusada")
+    monkeypatch.setattr(bot, 'get_http_session', lambda: FakeSession(error=error))
+    with pytest.raises(requests.ConnectionError):
+        bot.fetch_page_text(None, "https://museu.example/", 'http')
+
+def test_large_page_is_extracted_while_streaming(monkeypatch):
+    # Acima de STREAMING_THRESHOLD o documento não é montado em memória: o texto vai direto
+    # para o extrator, com os mesmos itens e hash do caminho com o documento inteiro
+    paragraph = '<p>Horário de visitação do museu e ingressos na entrada principal.</p>\n'
+    body = ('<html><head><title>Museu</title><meta charset="utf-8"></head><body>'
+            + paragraph * 20000
+            + '<p>Acessibilidade: rampa de acesso e elevador adaptado.</p><script>var rampa = 1;</script>'
+            + paragraph * 20000 + '</body></html>').encode('utf-8')
+    assert len(body) > bot.STREAMING_THRESHOLD
+    text = bot.html_to_text(body)
+
+    def whole_document(page_html, encoding=None):
+        raise AssertionError("documento inteiro em memória")
+
+    monkeypatch.setattr(bot, 'html_to_text', whole_document)
+    monkeypatch.setattr(bot, 'get_http_session', lambda: FakeSession(html_response(body, 'text/html')))
+    page = bot.fetch_http("https://museu.example/")
+    assert page['text'] is None
+    assert page['content_hash'] == bot.content_hash(text)
+    assert page['items'] == bot.extract_relevant_content(text, "https://museu.example/")
+    assert [item['term'] for item in page['items']] == ['elevador', 'rampa']
@@ -0,0 +1,53 @@
+import bot
+from results_store import ResultsStore
+from source_state import SourceStateStore
+
+PLAIN_PAGE = "Horário de funcionamento e endereço do museu."
+ACCESSIBLE_PAGE = (
+    "Acessibilidade: rampa de acesso, elevador adaptado para cadeirantes, banheiro adaptado, "
+    "piso tátil, audiodescrição, intérprete de libras e vaga especial para PCD."
+)
+
+def run(tmp_path, monkeypatch, pages, landmark):
+    monkeypatch.setattr(bot, 'fetch_page_text',
+                        lambda driver, source, fetch_mode=bot.FETCH_MODE, state=None: {
+                            'text': pages[source], 'not_modified': False, 'etag': None, 'last_modified': None
+                        })
+    source_state = SourceStateStore(str(tmp_path / "sources.sqlite"))
+    try:
+        [result] = bot.CrawlPipeline([landmark], 2, 'http', source_state).run()
+    finally:
+        source_state.close()
+    return result
+
+def setup(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot, 'get_coordinates', lambda name: list(bot.DEFAULT_COORDINATES))
+    bot.configure_results_store(str(tmp_path / "results.sqlite"))
+
+def test_failed_write_is_not_reused_as_unchanged(tmp_path, monkeypatch):
+    # O estado da fonte é gravado antes do resultado: se a gravação do resultado falhar,
+    # a próxima execução não pode reaproveitar o resultado antigo
+    setup(tmp_path, monkeypatch)
+    landmark = {'name': "Museu", 'sources': ["https://museu.example/"]}
+    pages = {"https://museu.example/": PLAIN_PAGE}
+    assert run(tmp_path, monkeypatch, pages, landmark)['classification'][0] == 'Não Acessível'
+
+    pages["https://museu.example/"] = ACCESSIBLE_PAGE
+
+    def fail(self, results):
+        raise OSError("disco cheio")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(ResultsStore, 'save_many', fail)
+        run(tmp_path, monkeypatch, pages, landmark)
+
+    assert run(tmp_path, monkeypatch, pages, landmark)['classification'][0] != 'Não Acessível'
+
+def test_removed_source_is_not_reused(tmp_path, monkeypatch):
+    setup(tmp_path, monkeypatch)
+    pages = {"https://museu.example/": PLAIN_PAGE, "https://cultura.example/museu": ACCESSIBLE_PAGE}
+    landmark = {'name': "Museu", 'sources': list(pages)}
+    assert run(tmp_path, monkeypatch, pages, landmark)['report']['found_any']
+
+    landmark = {'name': "Museu", 'sources': ["https://museu.example/"]}
+    assert not run(tmp_path, monkeypatch, pages, landmark)['report']['found_any']
@@ -0,0 +1,32 @@
+import os
+
+import map_data
+from map_data import geojson_feature, write_map_data
+
+def feature(name, lat, lon, score=1):
+    return geojson_feature(name, "Acessível", "green", {'score': score, 'features': {'rampa': 1}}, [lat, lon])
+
+def test_nearby_landmarks_get_separate_cells():
+    museu = feature("Museu Nacional", -15.7983, -47.8750)
+    torre = feature("Torre de TV", -15.7905, -47.8925)
+    assert map_data.cell_key(museu) != map_data.cell_key(torre)
+
+def test_only_changed_cells_are_serialized(tmp_path, monkeypatch):
+    directory = str(tmp_path / "map_data")
+    features = [feature("Museu Nacional", -15.7983, -47.8750), feature("Torre de TV", -15.7905, -47.8925),
+                feature("Catedral", -15.7983, -47.8755)]
+    files = write_map_data(features, directory)
+    assert len(files) == 2
+
+    dumps = []
+    real_dumps = map_data.json.dumps
+    monkeypatch.setattr(map_data.json, 'dumps', lambda *args, **kwargs: dumps.append(args) or real_dumps(*args, **kwargs))
+    assert write_map_data(features, directory) == files
+    assert dumps == []
+
+    features[1] = feature("Torre de TV", -15.7905, -47.8925, score=3)
+    write_map_data(features, directory)
+    assert [[f['properties']['n'] for f in args[0]['features']] for args in dumps] == [["Torre de TV"]]
+
+    write_map_data(features[:1], directory)
+    assert sorted(os.listdir(directory)) == sorted([map_data.MANIFEST_NAME, files[0]])
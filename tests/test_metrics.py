@@ -0,0 +1,27 @@
+import bot
+from metrics import CrawlMetrics, metrics
+
+def test_shared_time_is_split_between_landmarks():
+    crawl_metrics = CrawlMetrics()
+    crawl_metrics.observe_shared('json_write', 0.3, ["Museu", "Catedral", "Torre"])
+    summary = crawl_metrics.summary()
+    assert summary['stages']['json_write']['count'] == 1
+    assert summary['stages']['json_write']['total_seconds'] == 0.3
+    assert all(abs(summary['landmarks'][name]['stages']['json_write'] - 0.1) < 1e-9
+               for name in ("Museu", "Catedral", "Torre"))
+
+def test_pipeline_records_json_write_per_landmark(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot, 'fetch_page_text',
+                        lambda driver, source, fetch_mode=bot.FETCH_MODE, state=None: {
+                            'text': "Rampa de acesso e elevador adaptado.", 'not_modified': False,
+                            'etag': None, 'last_modified': None
+                        })
+    monkeypatch.setattr(bot, 'get_coordinates', lambda name: list(bot.DEFAULT_COORDINATES))
+    bot.configure_results_store(str(tmp_path / "results.sqlite"))
+    landmarks = [{'name': f"Ponto {i}", 'sources': [f"https://turismo.example/{i}"]} for i in range(5)]
+
+    bot.CrawlPipeline(landmarks, 2, 'http').run()
+
+    for landmark in landmarks:
+        stages = metrics.summary()['landmarks'][landmark['name']]['stages']
+        assert {'geocoding', 'json_write', 'matching'} <= set(stages)
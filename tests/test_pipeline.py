@@ -0,0 +1,36 @@
+import time
+import threading
+
+import pytest
+
+from pipeline import Stage, run_pipeline
+
+def test_interrupted_pipeline_stops_before_returning():
+    # Ctrl+C no meio da alimentação: quando run_pipeline sai, nenhuma etapa grava mais
+    written = []
+    lock = threading.Lock()
+
+    def slow(item):
+        time.sleep(0.01)
+        return item
+
+    def write(batch):
+        with lock:
+            written.extend(batch)
+
+    def items():
+        for i in range(1000):
+            if i == 50:
+                raise KeyboardInterrupt
+            yield i
+
+    stages = [Stage('fetch', slow, workers=4), Stage('extract', slow), Stage('write', write, batch_size=5)]
+    with pytest.raises(KeyboardInterrupt):
+        run_pipeline(stages, items())
+
+    with lock:
+        count = len(written)
+    time.sleep(0.2)
+    assert len(written) == count
+    assert count < 50
+    assert not any(thread.is_alive() for stage in stages for thread in stage._threads)
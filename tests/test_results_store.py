@@ -0,0 +1,33 @@
+import pytest
+
+import bot
+from results_store import ResultsStore, ResultsWatcher
+
+def result(name):
+    report = bot.format_report([])
+    return bot.result_data(name, report, bot.classify_accessibility(report), [], bot.DEFAULT_COORDINATES)
+
+def test_watcher_redelivers_changes_after_failed_callback(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.sqlite"))
+    store.save(result("Museu"))
+    delivered = []
+
+    def on_change(updated, removed):
+        if not delivered:
+            delivered.append(None)
+            raise RuntimeError("índice ainda não pronto")
+        delivered.append(([point['name'] for point in updated], removed))
+
+    watcher = ResultsWatcher(store, [], 0, on_change)
+    with pytest.raises(RuntimeError):
+        watcher.check()
+    assert watcher.revision == 0
+
+    watcher.check()
+    assert delivered[1:] == [(["Museu"], [])]
+    assert watcher.revision == store.revision()
+
+    store.delete("Museu")
+    watcher.check()
+    assert delivered[2:] == [([], ["Museu"])]
+    store.close()
@@ -0,0 +1,23 @@
+from run_journal import RunJournal
+
+def test_resume_continues_interrupted_run(tmp_path):
+    journal = RunJournal(str(tmp_path / "journal.sqlite"))
+    run_id = journal.start("pontos.txt", 2)
+    journal.record_landmarks(["Museu Nacional"])
+    journal.finish('interrupted')
+
+    journal = RunJournal(str(tmp_path / "journal.sqlite"))
+    assert journal.resume("pontos.txt", 2) == run_id
+    assert journal.is_done("Museu Nacional")
+
+def test_resume_does_not_reopen_abandoned_run(tmp_path):
+    journal = RunJournal(str(tmp_path / "journal.sqlite"))
+    first = journal.start("pontos.txt", 2)
+    journal.record_landmarks(["Museu Nacional"])
+    # Uma nova execução sem --resume abandona a anterior e apaga o detalhe dela
+    second = journal.start("pontos.txt", 2)
+    journal.finish('completed')
+
+    run_id = journal.resume("pontos.txt", 2)
+    assert run_id not in (first, second)
+    assert not journal.is_done("Museu Nacional")
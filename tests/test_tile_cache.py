@@ -0,0 +1,36 @@
+import tile_cache
+from tile_cache import TileCache
+
+def test_reads_do_not_write_recent_last_access(tmp_path):
+    cache = TileCache(str(tmp_path / "tiles.mbtiles"))
+    cache.set(12, 1510, 1880, b'png')
+    changes = cache._conn.total_changes
+    for _ in range(10):
+        assert cache.get(12, 1510, 1880) == b'png'
+    assert cache._conn.total_changes == changes
+
+    # Acesso antigo: a leitura regrava last_access uma vez
+    cache._conn.execute("UPDATE tiles SET last_access = last_access - ?", (tile_cache.ACCESS_UPDATE_INTERVAL + 1,))
+    cache._conn.commit()
+    changes = cache._conn.total_changes
+    cache.get(12, 1510, 1880)
+    cache.get(12, 1510, 1880)
+    assert cache._conn.total_changes == changes + 1
+    cache.close()
+
+def test_failed_tile_waits_with_backoff(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tile_cache.time, 'monotonic', lambda: now[0])
+    cache = TileCache(str(tmp_path / "tiles.mbtiles"))
+    assert cache.should_download(12, 1510, 1880)
+
+    assert cache.download_failed(12, 1510, 1880) == tile_cache.FAILED_TILE_RETRY
+    assert not cache.should_download(12, 1510, 1880)
+    assert cache.should_download(12, 1511, 1880)
+    now[0] += tile_cache.FAILED_TILE_RETRY
+    assert cache.should_download(12, 1510, 1880)
+
+    assert cache.download_failed(12, 1510, 1880) == 2 * tile_cache.FAILED_TILE_RETRY
+    cache.set(12, 1510, 1880, b'png')
+    assert cache.should_download(12, 1510, 1880)
+    cache.close()
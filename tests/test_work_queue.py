@@ -0,0 +1,68 @@
+import time
+import threading
+
+import bot
+from crawl_scheduler import HostScheduler
+from work_queue import WorkQueue
+
+HOSTS = ('turismo.example', 'cultura.example', 'mapa.example')
+
+def fake_fetch(driver, source, fetch_mode=bot.FETCH_MODE, source_state=None):
+    time.sleep(0.01)
+    text = f"Acesso com rampa e elevador adaptado para cadeirantes em {source}"
+    return None, {'text': text, 'not_modified': False, 'etag': None, 'last_modified': None}
+
+def test_two_workers_finish_shared_queue(tmp_path, monkeypatch):
+    # Regressão: a leitura antecipada para alternar hosts segurava pontos já reservados
+    # enquanto esperava as reservas do outro worker, e os dois ficavam parados
+    monkeypatch.setattr(bot, 'fetch_source', fake_fetch)
+    monkeypatch.setattr(bot, 'get_coordinates', lambda name: list(bot.DEFAULT_COORDINATES))
+    bot.configure_results_store(str(tmp_path / "results.sqlite"), shared=True)
+    landmarks = [
+        {'name': f"Ponto {i}", 'sources': [f"https://{host}/ponto{i}.html" for host in HOSTS]}
+        for i in range(40)
+    ]
+    queue_path = str(tmp_path / "fila.sqlite")
+    WorkQueue(queue_path).enqueue(landmarks)
+
+    results = {}
+
+    def run(worker):
+        work_queue = WorkQueue(queue_path, lease_seconds=3)
+        pipeline = bot.CrawlPipeline(landmarks, 4, 'http', work_queue=work_queue, worker=worker,
+                                     scheduler=HostScheduler(2, 0))
+        results[worker] = pipeline.run()
+        work_queue.close()
+
+    threads = [threading.Thread(target=run, args=(f"w{i}",), daemon=True) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    assert not any(thread.is_alive() for thread in threads)
+    work_queue = WorkQueue(queue_path)
+    assert work_queue.counts() == {'queued': 0, 'leased': 0, 'done': 40, 'failed': 0}
+    work_queue.close()
+    names = [result['name'] for worker_results in results.values() for result in worker_results]
+    assert sorted(names) == sorted(landmark['name'] for landmark in landmarks)
+
+def test_reset_starts_a_new_round(tmp_path):
+    landmarks = [{'name': f"Ponto {i}", 'sources': [f"https://turismo.example/{i}"]} for i in range(3)]
+    work_queue = WorkQueue(str(tmp_path / "fila.sqlite"))
+    work_queue.enqueue(landmarks)
+    claimed = work_queue.claim("w1", 3)
+    work_queue.complete("w1", [landmark['name'] for _, landmark in claimed])
+
+    # Sem reset, a nova execução encontra tudo concluído
+    assert work_queue.enqueue(landmarks) == 0
+    assert work_queue.claim("w1") == []
+
+    assert work_queue.enqueue(landmarks, reset=True) == 3
+    assert work_queue.counts() == {'queued': 3, 'leased': 0, 'done': 0, 'failed': 0}
+
+    # Um worker com reservas em andamento impede o reset
+    work_queue.claim("w2", 1)
+    assert not work_queue.reset()
+    assert work_queue.counts()['leased'] == 1
+    work_queue.close()
@@ -0,0 +1,282 @@
+import os
+import sys
+import math
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Cache de tiles no formato MBTiles (linhas TMS, contadas de baixo para cima, como no MapView)
+TILE_CACHE_PATH = os.path.join("cache", "tiles.mbtiles")
+TILE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+# Ao passar do limite, remove os tiles menos usados até ficar nesta fração do limite
+TILE_CACHE_EVICT_TO = 0.9
+# A leitura só regrava last_access (usado pelo LRU) se o valor salvo for mais antigo que isso,
+# para que ler um tile não vire uma escrita no disco
+ACCESS_UPDATE_INTERVAL = 10 * 60
+# Tile que falhou no download só é tentado de novo depois de um intervalo, que dobra a cada
+# falha seguida (até FAILED_TILE_MAX_RETRY)
+FAILED_TILE_RETRY = 30
+FAILED_TILE_MAX_RETRY = 15 * 60
+TILE_URL = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+TILE_USER_AGENT = "TurismoAcessivelDF/1.0 (cache de tiles)"
+TILE_TIMEOUT = 10
+# Política de uso do OSM: poucas conexões e sem downloads em massa
+PREFETCH_WORKERS = 2
+PREFETCH_INTERVAL = 0.1
+MAX_PREFETCH_TILES = 10000
+PREFETCH_MIN_ZOOM = 10
+PREFETCH_MAX_ZOOM = 15
+# Margem (em graus) em volta das coordenadas dos resultados
+PREFETCH_MARGIN = 0.02
+MAX_LATITUDE = 85.0511
+
+class TileCache:
+    def __init__(self, path=TILE_CACHE_PATH, max_bytes=TILE_CACHE_MAX_BYTES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # (zoom, coluna, linha) -> (falhas seguidas, instante da próxima tentativa); só em memória
+        self._failures = {}
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tiles (
+                zoom_level INTEGER,
+                tile_column INTEGER,
+                tile_row INTEGER,
+                tile_data BLOB,
+                -- Colunas extras para o LRU (ignoradas por leitores de MBTiles)
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (zoom_level, tile_column, tile_row)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tiles_last_access ON tiles (last_access)")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO metadata (name, value) VALUES (?, ?)",
+            [('name', 'Turismo Acessível DF'), ('format', 'png'), ('minzoom', '0'), ('maxzoom', '19')]
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM tiles").fetchone()[0]
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+
+    def contains(self, zoom, column, row):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (zoom, column, row)
+            ).fetchone() is not None
+
+    def get(self, zoom, column, row):
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT tile_data, last_access FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (zoom, column, row)
+            ).fetchone()
+            if found is None:
+                return None
+            data, last_access = found
+            now = time.time()
+            if now - last_access >= ACCESS_UPDATE_INTERVAL:
+                with self._conn:
+                    self._conn.execute(
+                        "UPDATE tiles SET last_access = ? WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                        (now, zoom, column, row)
+                    )
+        return data
+
+    def should_download(self, zoom, column, row):
+        # False enquanto o tile estiver no intervalo de espera depois de uma falha
+        with self._lock:
+            failure = self._failures.get((zoom, column, row))
+        return failure is None or time.monotonic() >= failure[1]
+
+    def download_failed(self, zoom, column, row):
+        # Retorna em quantos segundos o tile pode ser tentado de novo
+        with self._lock:
+            failures = self._failures.get((zoom, column, row), (0, 0))[0] + 1
+            delay = min(FAILED_TILE_RETRY * 2 ** (failures - 1), FAILED_TILE_MAX_RETRY)
+            self._failures[(zoom, column, row)] = (failures, time.monotonic() + delay)
+        return delay
+
+    def set(self, zoom, column, row, data):
+        with self._lock, self._conn:
+            self._failures.pop((zoom, column, row), None)
+            previous = self._conn.execute(
+                "SELECT size FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (zoom, column, row)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (zoom, column, row, sqlite3.Binary(data), len(data), time.time())
+            )
+            self._total_bytes += len(data) - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        target = self.max_bytes * TILE_CACHE_EVICT_TO
+        removed = 0
+        rows = self._conn.execute(
+            "SELECT zoom_level, tile_column, tile_row, size FROM tiles ORDER BY last_access"
+        ).fetchall()
+        for zoom, column, row, size in rows:
+            if self._total_bytes <= target:
+                break
+            self._conn.execute(
+                "DELETE FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (zoom, column, row)
+            )
+            self._total_bytes -= size
+            removed += 1
+        logger.info(f"Cache de tiles: {removed} tiles removidos (limite de {self.max_bytes} bytes)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def tms_row(zoom, y):
+    return (2 ** zoom) - 1 - y
+
+def tile_xy(lat, lon, zoom):
+    # Tile XYZ (y contado de cima para baixo) que contém a coordenada
+    n = 2 ** zoom
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def tiles_in_bbox(bbox, min_zoom, max_zoom):
+    # bbox = (lat_min, lon_min, lat_max, lon_max); gera (zoom, x, y) em XYZ
+    lat_min, lon_min, lat_max, lon_max = bbox
+    for zoom in range(min_zoom, max_zoom + 1):
+        x1, y1 = tile_xy(lat_max, lon_min, zoom)
+        x2, y2 = tile_xy(lat_min, lon_max, zoom)
+        for x in range(x1, x2 + 1):
+            for y in range(y1, y2 + 1):
+                yield zoom, x, y
+
+def count_tiles(bbox, min_zoom, max_zoom):
+    lat_min, lon_min, lat_max, lon_max = bbox
+    total = 0
+    for zoom in range(min_zoom, max_zoom + 1):
+        x1, y1 = tile_xy(lat_max, lon_min, zoom)
+        x2, y2 = tile_xy(lat_min, lon_max, zoom)
+        total += (x2 - x1 + 1) * (y2 - y1 + 1)
+    return total
+
+def results_bbox(points, margin=PREFETCH_MARGIN):
+    coordinates = [
+        (point['coordinates']['latitude'], point['coordinates']['longitude'])
+        for point in points
+        if point.get('coordinates', {}).get('latitude') is not None
+        and point.get('coordinates', {}).get('longitude') is not None
+    ]
+    if not coordinates:
+        return None
+    lats = [lat for lat, _ in coordinates]
+    lons = [lon for _, lon in coordinates]
+    return (min(lats) - margin, min(lons) - margin, max(lats) + margin, max(lons) + margin)
+
+_http_session = None
+
+def get_tile_session():
+    global _http_session
+    if _http_session is None:
+        _http_session = requests.Session()
+        _http_session.headers['User-Agent'] = TILE_USER_AGENT
+    return _http_session
+
+def download_tile(zoom, x, y, url=TILE_URL):
+    response = get_tile_session().get(url.format(z=zoom, x=x, y=y), timeout=TILE_TIMEOUT)
+    response.raise_for_status()
+    return response.content
+
+def prefetch(cache, bbox, min_zoom, max_zoom, url=TILE_URL, workers=PREFETCH_WORKERS, interval=PREFETCH_INTERVAL):
+    pending = [
+        (zoom, x, y) for zoom, x, y in tiles_in_bbox(bbox, min_zoom, max_zoom)
+        if not cache.contains(zoom, x, tms_row(zoom, y))
+    ]
+    logger.info(f"{len(pending)} tiles a baixar entre os zooms {min_zoom} e {max_zoom}")
+
+    def fetch(tile):
+        zoom, x, y = tile
+        try:
+            cache.set(zoom, x, tms_row(zoom, y), download_tile(zoom, x, y, url))
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao baixar o tile {zoom}/{x}/{y}: {e}")
+            return False
+        finally:
+            time.sleep(interval)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        downloaded = sum(executor.map(fetch, pending))
+    logger.info(f"Pré-carregamento concluído: {downloaded} baixados, {len(pending) - downloaded} com erro")
+    return downloaded
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pré-carrega os tiles do mapa na área dos resultados")
+    parser.add_argument("--min-zoom", type=int, default=PREFETCH_MIN_ZOOM)
+    parser.add_argument("--max-zoom", type=int, default=PREFETCH_MAX_ZOOM)
+    parser.add_argument("--bbox", help="Área a baixar (lat_min,lon_min,lat_max,lon_max); padrão: coordenadas dos resultados")
+    parser.add_argument("--url", default=TILE_URL, help="Servidor de tiles ({z}/{x}/{y})")
+    parser.add_argument("--cache", default=TILE_CACHE_PATH, help="Arquivo MBTiles do cache")
+    parser.add_argument("--max-mb", type=int, default=TILE_CACHE_MAX_BYTES // (1024 * 1024),
+                        help="Tamanho máximo do cache (MB)")
+    parser.add_argument("--max-tiles", type=int, default=MAX_PREFETCH_TILES,
+                        help="Aborta se a área exigir mais tiles que isso")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    from results_store import ResultsStore
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args(argv)
+    if args.bbox:
+        bbox = tuple(float(value) for value in args.bbox.split(','))
+    else:
+        store = ResultsStore()
+        try:
+            store.migrate_from_directory()
+            bbox = results_bbox(store.load_summaries())
+        finally:
+            store.close()
+    if bbox is None:
+        logger.error("Nenhum resultado com coordenadas para definir a área do mapa.")
+        return 1
+
+    total = count_tiles(bbox, args.min_zoom, args.max_zoom)
+    if total > args.max_tiles:
+        logger.error(f"A área exige {total} tiles (limite {args.max_tiles}). Reduza --max-zoom ou aumente --max-tiles.")
+        return 1
+
+    cache = TileCache(args.cache, args.max_mb * 1024 * 1024)
+    try:
+        prefetch(cache, bbox, args.min_zoom, args.max_zoom, args.url)
+        logger.info(f"Cache de tiles: {cache.count()} tiles, {cache.total_bytes / (1024 * 1024):.1f} MB em {cache.path}")
+    finally:
+        cache.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
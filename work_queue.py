@@ -0,0 +1,280 @@
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import logging
+import argparse
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Fila de trabalho compartilhada entre vários processos do bot (inclusive em outras máquinas,
+# com o arquivo numa pasta de rede). Sem WAL: o WAL depende de memória compartilhada e só
+# funciona entre processos da mesma máquina.
+WORK_QUEUE_PATH = os.path.join("cache", "work_queue.sqlite")
+# Um ponto fica reservado por LEASE_SECONDS; o worker renova a reserva a cada HEARTBEAT_INTERVAL
+LEASE_SECONDS = 300
+HEARTBEAT_INTERVAL = 60
+CLAIM_BATCH_SIZE = 4
+# Sem pontos livres, espera as reservas dos outros workers terminarem ou vencerem
+POLL_INTERVAL = 5
+# Depois de MAX_ATTEMPTS reservas sem conclusão o ponto fica como 'failed'
+MAX_ATTEMPTS = 3
+STATUSES = ('queued', 'leased', 'done', 'failed')
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class WorkQueue:
+    def __init__(self, path=WORK_QUEUE_PATH, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # isolation_level=None: as transações são abertas com BEGIN IMMEDIATE, que trava a
+        # base para escrita antes de ler, e dois workers não reservam o mesmo ponto
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=DELETE")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                name TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                sources TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, position)")
+
+    def _transaction(self, work):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def _active_leases(self, conn, now):
+        return conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status = 'leased' AND lease_expires >= ?", (now,)
+        ).fetchone()[0]
+
+    def _reset(self, conn, now):
+        # Apaga a rodada anterior (inclusive os 'done'), a não ser que algum worker ainda tenha
+        # reservas válidas: nesse caso a rodada em andamento é mantida
+        active = self._active_leases(conn, now)
+        if active:
+            logger.warning(f"Fila de trabalho: {active} reserva(s) em andamento; a fila não foi reiniciada")
+            return False
+        conn.execute("DELETE FROM tasks")
+        return True
+
+    def reset(self):
+        def work(conn):
+            return self._reset(conn, time.time())
+
+        if self._transaction(work):
+            logger.info("Fila de trabalho reiniciada")
+            return True
+        return False
+
+    def enqueue(self, landmarks, reset=False):
+        # Pontos já presentes mantêm o estado (vários workers podem enfileirar o mesmo arquivo);
+        # com reset, a rodada anterior é apagada antes e todos os pontos voltam a 'queued'
+        now = time.time()
+        rows = [
+            (landmark['name'], position, json.dumps(landmark['sources'], ensure_ascii=False), now)
+            for position, landmark in enumerate(landmarks)
+        ]
+
+        def work(conn):
+            if reset and self._reset(conn, now):
+                logger.info("Fila de trabalho reiniciada")
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (name, position, sources, updated_at) VALUES (?, ?, ?, ?)", rows
+            )
+            return conn.total_changes - before
+
+        added = self._transaction(work)
+        logger.info(f"Fila de trabalho: {added} pontos novos de {len(rows)}")
+        return added
+
+    def _requeue_expired(self, conn, now):
+        # Reservas vencidas (worker parado ou sem heartbeat) voltam para a fila
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', worker = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, now, self.max_attempts)
+        )
+        return conn.execute(
+            "UPDATE tasks SET status = 'queued', worker = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now, now)
+        ).rowcount
+
+    def claim(self, worker, limit=CLAIM_BATCH_SIZE):
+        # Reserva até limit pontos: [(posição, {'name', 'sources'})]
+        def work(conn):
+            now = time.time()
+            requeued = self._requeue_expired(conn, now)
+            if requeued:
+                logger.warning(f"Fila de trabalho: {requeued} reserva(s) vencida(s) voltaram para a fila")
+            rows = conn.execute(
+                "SELECT name, position, sources FROM tasks WHERE status = 'queued' ORDER BY position LIMIT ?",
+                (limit,)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE name = ?",
+                [(worker, now + self.lease_seconds, now, name) for name, _, _ in rows]
+            )
+            return [(position, {'name': name, 'sources': json.loads(sources)}) for name, position, sources in rows]
+
+        return self._transaction(work)
+
+    def heartbeat(self, worker, names):
+        # Renova as reservas que ainda são deste worker; retorna quantas foram renovadas
+        def work(conn):
+            now = time.time()
+            return conn.executemany(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? WHERE name = ? AND worker = ? AND status = 'leased'",
+                [(now + self.lease_seconds, now, name, worker) for name in names]
+            ).rowcount
+
+        return self._transaction(work)
+
+    def complete(self, worker, names):
+        def work(conn):
+            now = time.time()
+            conn.executemany(
+                "UPDATE tasks SET status = 'done', worker = ?, lease_expires = NULL, error = NULL, updated_at = ? "
+                "WHERE name = ?",
+                [(worker, now, name) for name in names]
+            )
+
+        self._transaction(work)
+
+    def release(self, worker, names, error=None):
+        # Devolve pontos não concluídos (ou marca 'failed' depois de MAX_ATTEMPTS reservas)
+        def work(conn):
+            now = time.time()
+            conn.executemany(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "worker = NULL, lease_expires = NULL, error = ?, updated_at = ? "
+                "WHERE name = ? AND worker = ? AND status = 'leased'",
+                [(self.max_attempts, error, now, name, worker) for name in names]
+            )
+
+        self._transaction(work)
+
+    def requeue_failed(self):
+        def work(conn):
+            return conn.execute(
+                "UPDATE tasks SET status = 'queued', attempts = 0, error = NULL, updated_at = ? WHERE status = 'failed'",
+                (time.time(),)
+            ).rowcount
+
+        return self._transaction(work)
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall()
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(rows)
+        return counts
+
+    def leased_elsewhere(self, worker):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE status = 'leased' AND worker != ?", (worker,)
+            ).fetchone()[0]
+
+    def finished(self):
+        counts = self.counts()
+        return counts['queued'] == 0 and counts['leased'] == 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class Heartbeat:
+    # Thread que renova periodicamente as reservas em andamento de um worker
+    def __init__(self, work_queue, worker, interval=HEARTBEAT_INTERVAL):
+        self.work_queue = work_queue
+        self.worker = worker
+        self.interval = interval
+        self._held = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="heartbeat", daemon=True)
+
+    def hold(self, names):
+        with self._lock:
+            self._held.update(names)
+
+    def drop(self, names):
+        with self._lock:
+            self._held.difference_update(names)
+
+    def held(self):
+        with self._lock:
+            return list(self._held)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            names = self.held()
+            if not names:
+                continue
+            try:
+                renewed = self.work_queue.heartbeat(self.worker, names)
+                if renewed < len(names):
+                    logger.warning(f"{len(names) - renewed} reserva(s) de {self.worker} venceram e foram para outro worker")
+            except Exception as e:
+                logger.error(f"Erro no heartbeat da fila de trabalho: {e}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Estado da fila de trabalho compartilhada do bot")
+    parser.add_argument("--queue", default=WORK_QUEUE_PATH, help="Arquivo da fila")
+    parser.add_argument("--requeue-failed", action="store_true", help="Devolve os pontos com falha para a fila")
+    parser.add_argument("--reset", action="store_true",
+                        help="Apaga a fila (inclusive os pontos concluídos) para uma nova rodada")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    args = parse_args(argv)
+    work_queue = WorkQueue(args.queue)
+    try:
+        if args.reset:
+            work_queue.reset()
+        if args.requeue_failed:
+            logger.info(f"{work_queue.requeue_failed()} ponto(s) devolvido(s) para a fila")
+        for status, count in work_queue.counts().items():
+            print(f"{status:>7}: {count}")
+    finally:
+        work_queue.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())